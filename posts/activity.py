@@ -0,0 +1,104 @@
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import CharField, DateTimeField, Q, Subquery, Value
+
+from . import receipts
+from .models import Comment, Follow, Reaction
+from .paginators import decode_cursor, encode_cursor
+
+# kind -> (model, lookup of the user the event is addressed to,
+#          notification counter field, related rows shown on the page,
+#          condition on the rows of the kind)
+SOURCES = {
+    'comment': (Comment, 'post__author', 'comments',
+                ('author__profile', 'post'), Q()),
+    'follow': (Follow, 'author', 'followers', ('user__profile',), Q()),
+    'like': (Reaction, 'post__author', 'likes', ('user__profile', 'post'),
+             Q(value=Reaction.LIKE)),
+    'dislike': (Reaction, 'post__author', 'dislikes',
+                ('user__profile', 'post'), Q(value=Reaction.DISLIKE)),
+}
+
+Event = namedtuple('Event', 'kind item created is_new')
+
+
+def _older_than(kind, position):
+    """Rows of ``kind`` after ``position`` in (-created, -kind, -id) order.
+    """
+    created, position_kind, position_id = position
+    if kind < position_kind:
+        return Q(created__lte=created)
+    if kind > position_kind:
+        return Q(created__lt=created)
+    return Q(created__lt=created) | Q(created=created, id__lt=position_id)
+
+
+def _decode(cursor):
+    try:
+        created, kind, event_id = decode_cursor(cursor)
+        created = DateTimeField().to_python(created)
+        if kind not in SOURCES or created is None:
+            raise ValueError
+        return created, kind, int(event_id)
+    except (TypeError, ValueError, ValidationError):
+        return None
+
+
+def get_timeline(user, cursor=None, size=20):
+    """Return a window of ``user``'s events, newest first.
+
+    All event tables are merged in one UNION query that only yields
+    keys; each branch reads at most ``size + 1`` rows of its table. The
+    window is then loaded with one query per event type. Returns the
+    events and the cursor of the next (older) window.
+    """
+    position = _decode(cursor) if cursor else None
+    branches = []
+    for kind, (model, owner, _, _, condition) in SOURCES.items():
+        rows = model.objects.filter(condition, **{owner: user})
+        if position:
+            rows = rows.filter(_older_than(kind, position))
+        # SQLite allows no LIMIT in the branches of a compound query,
+        # so the limited scan is a subquery of the branch
+        newest = rows.order_by('-created', '-id').values('pk')[:size + 1]
+        rows = model.objects.filter(pk__in=Subquery(newest))
+        branches.append(rows.order_by().annotate(
+            kind=Value(kind, output_field=CharField()),
+        ).values_list('created', 'kind', 'id', 'is_readed'))
+    window = list(branches[0].union(*branches[1:], all=True).order_by(
+        '-created', '-kind', '-id')[:size + 1])
+
+    next_cursor = None
+    if len(window) > size:
+        window = window[:size]
+        created, kind, event_id, _ = window[-1]
+        next_cursor = encode_cursor([created.isoformat(), kind, event_id])
+
+    items = {}
+    for kind, (model, _, _, related, _) in SOURCES.items():
+        ids = [event_id for _, event_kind, event_id, _ in window
+               if event_kind == kind]
+        if ids:
+            items[kind] = model.objects.select_related(*related).in_bulk(ids)
+    # rows deleted since the window was read are left out
+    events = [
+        Event(kind, items[kind][event_id], created, not is_readed)
+        for created, kind, event_id, is_readed in window
+        if event_id in items[kind]
+    ]
+    return events, next_cursor
+
+
+def mark_seen(user, events):
+    """Mark the ``events`` shown to ``user`` as read.
+
+    Runs one UPDATE per event type on the page; events on older windows
+    stay unread and counted.
+    """
+    for kind, (model, owner, counter, _, condition) in SOURCES.items():
+        ids = [event.item.id for event in events if event.kind == kind]
+        if ids:
+            receipts.mark_all_read(
+                model.objects.filter(condition, id__in=ids,
+                                     **{owner: user}), counter, user)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Group, Post, Comment, Follow, Like, Dislike, Chat, Message
+from .models import Group, Post, Comment, Follow, Reaction, Chat, Message
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -28,13 +28,9 @@ class FollowAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
-class LikeAdmin(admin.ModelAdmin):
-    list_display = ('user', 'publication')
-    empty_value_display = "-пусто-"
-
-
-class DislikeAdmin(admin.ModelAdmin):
-    list_display = ('user', 'publication')
+class ReactionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'post', 'value', 'created')
+    list_filter = ("value",)
     empty_value_display = "-пусто-"
 
 
@@ -52,6 +48,5 @@ admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
-admin.site.register(Like, LikeAdmin)
-admin.site.register(Dislike, LikeAdmin)
+admin.site.register(Reaction, ReactionAdmin)
 admin.site.register(Chat, ChatAdmin)
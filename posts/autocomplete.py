@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+
+from .models import Group, Post
+from .search import STOP_WORDS, tokenize
+
+User = get_user_model()
+
+_trie = None
+_built_at = 0
+_lock = threading.Lock()
+
+
+class Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+
+
+class Trie:
+    """A prefix tree keeping the best suggestions in every node.
+
+    Keys are inserted from the heaviest down, so each node just collects
+    the first ``size`` suggestions passing through it and a lookup is a
+    walk down the prefix with no sorting.
+    """
+
+    def __init__(self, entries, size):
+        self.root = Node()
+        for _, key, suggestion in sorted(entries, key=lambda entry: (
+                -entry[0], entry[1])):
+            self._insert(key, suggestion, size)
+
+    def _insert(self, key, suggestion, size):
+        node = self.root
+        for letter in key:
+            node = node.children.setdefault(letter, Node())
+            if len(node.top) < size and suggestion not in node.top:
+                node.top.append(suggestion)
+
+    def complete(self, prefix):
+        node = self.root
+        for letter in prefix:
+            node = node.children.get(letter)
+            if node is None:
+                return []
+        return node.top
+
+
+def _key(text):
+    return ' '.join(tokenize(text))
+
+
+def entries():
+    """Yield ``(weight, key, suggestion)`` for every completion."""
+    users = User.objects.values_list('username', 'profile__post_count')
+    for username, post_count in users:
+        yield post_count or 0, _key(username), {
+            'kind': 'user', 'value': username,
+            'url': reverse('posts:profile', args=[username])}
+
+    groups = Group.objects.values_list('slug', 'title', 'post_count')
+    for slug, title, post_count in groups:
+        suggestion = {'kind': 'group', 'value': title,
+                      'url': reverse('posts:group_posts', args=[slug])}
+        yield post_count, _key(title), suggestion
+        yield post_count, _key(slug), suggestion
+
+    words = Counter()
+    recent = Post.objects.order_by('-pub_date').values_list(
+        'title', 'text')[:settings.AUTOCOMPLETE_POSTS]
+    for title, text in recent:
+        words.update(word for word in tokenize(f'{title or ""} {text}')
+                     if len(word) > 2 and word not in STOP_WORDS)
+    for word, total in words.most_common(settings.AUTOCOMPLETE_TERMS):
+        yield total, word, {'kind': 'term', 'value': word, 'url': None}
+
+
+def build():
+    """Rebuild the trie of this process from the database."""
+    global _trie, _built_at
+    trie = Trie(list(entries()), settings.AUTOCOMPLETE_SIZE)
+    _trie, _built_at = trie, time.time()
+    return trie
+
+
+def _build_in_background():
+    try:
+        build()
+    finally:
+        _lock.release()
+        connection.close()
+
+
+def get_trie():
+    """Return the trie, rebuilding it in the background once it is old.
+
+    Only the first call in a process waits for the database.
+    """
+    if _trie is None:
+        with _lock:
+            return _trie or build()
+    if (time.time() - _built_at > settings.AUTOCOMPLETE_TTL
+            and _lock.acquire(blocking=False)):
+        threading.Thread(target=_build_in_background, daemon=True).start()
+    return _trie
+
+
+def complete(prefix):
+    """Return suggestions for what the user has typed so far."""
+    key = _key(prefix)
+    if not key:
+        return []
+    return get_trie().complete(key)
@@ -0,0 +1,46 @@
+"""Rendered post cards, cached across pages and viewers.
+
+A card is the part of post_item.html that is the same for every viewer.
+Its key holds the post id and Post.cache_version, which is bumped by
+every change shown on the card: an edit, a reaction, a comment, and a
+new name or avatar of the author or title of the group. A stale card is
+never looked up again and ages out of the cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+KEY_PREFIX = 'post_card'
+
+
+def cache_key(post):
+    return f'{KEY_PREFIX}:{post.id}:{post.cache_version}'
+
+
+def render(post):
+    """Return the card of ``post``, rendering it on a cache miss."""
+    key = cache_key(post)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string('post_card.html', {'post': post})
+        # a card showing a placeholder is rendered again once the
+        # thumbnail had the time to be made
+        timeout = settings.POST_CARD_CACHE_TTL
+        if static(settings.THUMBNAIL_PLACEHOLDER) in html:
+            timeout = settings.THUMBNAIL_PENDING_TTL
+        cache.set(key, html, timeout)
+    return mark_safe(html)
+
+
+def bump(posts):
+    """Make the cached cards of the ``posts`` queryset unreachable."""
+    posts.update(cache_version=F('cache_version') + 1)
+
+
+def bump_post(post_id):
+    bump(Post.objects.filter(id=post_id))
@@ -0,0 +1,198 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import (Count, F, IntegerField, OuterRef, Q,
+                              Subquery)
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Profile
+
+from .models import (Comment, Follow, Group, Message, NotificationCounter,
+                     Post, Reaction)
+
+User = get_user_model()
+
+# counter field -> (model, lookup of the user the unread row belongs to,
+#                   condition on the rows counted)
+SOURCES = {
+    'comments': (Comment, 'post__author', Q()),
+    'followers': (Follow, 'author', Q()),
+    'likes': (Reaction, 'post__author', Q(value=Reaction.LIKE)),
+    'dislikes': (Reaction, 'post__author', Q(value=Reaction.DISLIKE)),
+    'messages': (Message, 'recipient', Q()),
+}
+
+# Post counter field -> (model, lookup of the post the row belongs to,
+#                        condition on the rows counted)
+POST_SOURCES = {
+    'like_count': (Reaction, 'post', Q(value=Reaction.LIKE)),
+    'dislike_count': (Reaction, 'post', Q(value=Reaction.DISLIKE)),
+    'comment_count': (Comment, 'post', Q()),
+}
+# Profile counter field -> (model, lookup of the user the row belongs to,
+#                           condition on the rows counted)
+PROFILE_SOURCES = {
+    'follower_count': (Follow, 'author', Q()),
+    'following_count': (Follow, 'user', Q()),
+    'post_count': (Post, 'author', Q()),
+}
+GROUP_SOURCES = {
+    'post_count': (Post, 'group', Q()),
+}
+# reaction value -> (notification counter field, Post counter field)
+REACTION_FIELDS = {
+    Reaction.LIKE: ('likes', 'like_count'),
+    Reaction.DISLIKE: ('dislikes', 'dislike_count'),
+}
+RECOUNT_BATCH_SIZE = 1000
+
+
+def count_unread(user_ids=None):
+    """Count unread rows per user straight from the source tables."""
+    totals = defaultdict(dict)
+    for field, (model, owner, condition) in SOURCES.items():
+        unread = model.objects.filter(condition, is_readed=False)
+        if user_ids is not None:
+            unread = unread.filter(**{f'{owner}__in': user_ids})
+        rows = unread.values(owner).annotate(total=Count('id'))
+        for row in rows:
+            if row[owner] is not None:
+                totals[row[owner]][field] = row['total']
+    return totals
+
+
+def rebuild(user_ids=None):
+    """Reconcile stored counters with the source tables.
+
+    Returns the number of counters that were created or corrected.
+    """
+    if user_ids is None:
+        user_ids = list(User.objects.values_list('id', flat=True))
+    totals = count_unread(user_ids)
+    existing = NotificationCounter.objects.in_bulk(
+        user_ids, field_name='user_id')
+    changed, missing = [], []
+    for user_id in user_ids:
+        counts = {field: totals[user_id].get(field, 0) for field in SOURCES}
+        counter = existing.get(user_id)
+        if counter is None:
+            missing.append(NotificationCounter(user_id=user_id, **counts))
+            continue
+        if any(getattr(counter, field) != value
+               for field, value in counts.items()):
+            for field, value in counts.items():
+                setattr(counter, field, value)
+            changed.append(counter)
+    NotificationCounter.objects.bulk_update(changed, list(SOURCES))
+    for counter in missing:
+        try:
+            with transaction.atomic():
+                counter.save()
+        except IntegrityError:
+            # created concurrently by another request
+            pass
+    return len(changed) + len(missing)
+
+
+def get_counter(user):
+    """Return the counter of ``user``, building it on first access."""
+    counter = NotificationCounter.objects.filter(user=user).first()
+    if counter is None:
+        rebuild([user.id])
+        counter = NotificationCounter.objects.get(user=user)
+    return counter
+
+
+def increment(user_id, field, delta=1):
+    updated = NotificationCounter.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta})
+    if not updated:
+        # the source row is already saved, so rebuilding counts it too
+        rebuild([user_id])
+
+
+def decrement(field, delta=1, **user_lookup):
+    """Lower ``field`` for the counters of the users matching the lookup."""
+    if delta:
+        NotificationCounter.objects.filter(**user_lookup).update(
+            **{field: Greatest(F(field) - delta, 0)})
+
+
+def adjust_post(post_id, field, delta):
+    """Move a Post counter by ``delta`` without reading the row.
+
+    The counters are shown on the post card, so its version moves too.
+    """
+    if post_id and delta:
+        Post.objects.filter(id=post_id).update(
+            cache_version=F('cache_version') + 1,
+            **{field: Greatest(F(field) + delta, 0)})
+
+
+def adjust_profile(user_id, field, delta):
+    """Move a Profile counter of ``user_id`` by ``delta``."""
+    if user_id and delta:
+        Profile.objects.filter(user_id=user_id).update(
+            **{field: Greatest(F(field) + delta, 0)})
+
+
+def adjust_group(group_id, delta):
+    """Move the post_count of ``group_id`` by ``delta``."""
+    if group_id and delta:
+        Group.objects.filter(id=group_id).update(
+            post_count=Greatest(F('post_count') + delta, 0))
+
+
+def _actual_count(model, lookup, condition, owner='pk'):
+    rows = model.objects.filter(
+        condition, **{lookup: OuterRef(owner)}).order_by(
+    ).values(lookup).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def _recount(model, sources, batch_size, owner='pk', extra=None):
+    """Recount the counters of ``model`` in id batches; return the number
+    of rows fixed.
+
+    ``extra`` are more updates made to the rows fixed.
+    """
+    rows = model.objects.order_by('id').annotate(**{
+        f'actual_{field}': _actual_count(*source, owner=owner)
+        for field, source in sources.items()
+    }).only('id', *sources)
+    fixed = 0
+    last_id = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return fixed
+        changed = [
+            row.id for row in batch
+            if any(getattr(row, field) != getattr(row, f'actual_{field}')
+                   for field in sources)
+        ]
+        if changed:
+            # recounted in the UPDATE itself, so rows added meanwhile count
+            model.objects.filter(id__in=changed).update(**{
+                field: _actual_count(*source, owner=owner)
+                for field, source in sources.items()
+            }, **(extra or {}))
+        fixed += len(changed)
+        last_id = batch[-1].id
+
+
+def recount_posts(batch_size=RECOUNT_BATCH_SIZE):
+    """Recount Post counters in id batches; return the number fixed."""
+    return _recount(Post, POST_SOURCES, batch_size,
+                    extra={'cache_version': F('cache_version') + 1})
+
+
+def recount_profiles(batch_size=RECOUNT_BATCH_SIZE):
+    """Recount Profile counters in id batches; return the number fixed."""
+    return _recount(Profile, PROFILE_SOURCES, batch_size, owner='user_id')
+
+
+def recount_groups(batch_size=RECOUNT_BATCH_SIZE):
+    """Recount Group.post_count in id batches; return the number fixed."""
+    return _recount(Group, GROUP_SOURCES, batch_size)
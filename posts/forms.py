@@ -1,6 +1,7 @@
 from django.forms import ModelForm
 from django import forms
 
+from . import images
 from .models import Comment, Post, Group, Message
 
 
@@ -9,6 +10,10 @@ class PostForm(ModelForm):
         model = Post
         fields = ['group', 'title', 'text', 'image']
 
+    def clean_image(self):
+        return images.clean_upload(self, 'image', 'image_width',
+                                   'image_height')
+
 
 class CommentForm(ModelForm):
     class Meta:
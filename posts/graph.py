@@ -0,0 +1,95 @@
+"""Queries over the follow graph.
+
+Each function returns a page of user ids and the cursor of the next one,
+so lists of any length are read with one indexed range scan per page.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .models import Follow
+from .paginators import decode_cursor, encode_cursor
+
+IdPage = namedtuple('IdPage', 'ids next_cursor')
+
+
+def _position(cursor, size):
+    """Decode ``cursor`` into its values; a bad one starts from the top.
+    """
+    if not cursor:
+        return None
+    try:
+        values = decode_cursor(cursor)
+        if len(values) != size or not all(
+                isinstance(value, int) for value in values):
+            raise ValueError
+    except (TypeError, ValueError):
+        return None
+    return values
+
+
+def _edges(edges, column, cursor, limit):
+    """Page through ``edges`` newest follow first."""
+    limit = limit or settings.GRAPH_PAGE_SIZE
+    position = _position(cursor, 1)
+    if position:
+        edges = edges.filter(id__lt=position[0])
+    rows = list(edges.order_by('-id').values_list('id', column)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][0]])
+    return IdPage([user_id for _, user_id in rows], next_cursor)
+
+
+def followers(user_id, cursor=None, limit=None):
+    """Ids of the users following ``user_id``."""
+    return _edges(Follow.objects.filter(author_id=user_id), 'user_id',
+                  cursor, limit)
+
+
+def followees(user_id, cursor=None, limit=None):
+    """Ids of the authors ``user_id`` follows."""
+    return _edges(Follow.objects.filter(user_id=user_id), 'author_id',
+                  cursor, limit)
+
+
+def mutuals(user_id, cursor=None, limit=None):
+    """Ids of the authors ``user_id`` follows who follow them back."""
+    follows_back = Follow.objects.filter(user_id=OuterRef('author_id'),
+                                         author_id=user_id)
+    edges = Follow.objects.filter(user_id=user_id).annotate(
+        mutual=Exists(follows_back)).filter(mutual=True)
+    return _edges(edges, 'author_id', cursor, limit)
+
+
+def suggestions(user_id, cursor=None, limit=None):
+    """Ids of authors followed by the authors ``user_id`` follows.
+
+    Best first: by how many of them follow the author. Only the
+    GRAPH_SUGGESTION_SOURCES latest followees are asked, which keeps the
+    cost flat for users who follow many authors.
+    """
+    limit = limit or settings.GRAPH_PAGE_SIZE
+    sources = Follow.objects.filter(user_id=user_id).order_by(
+        '-id').values('author_id')[:settings.GRAPH_SUGGESTION_SOURCES]
+    followed = Follow.objects.filter(user_id=user_id,
+                                     author_id=OuterRef('author_id'))
+    candidates = Follow.objects.filter(
+        user_id__in=list(sources.values_list('author_id', flat=True)),
+    ).exclude(author_id=user_id).annotate(
+        followed=Exists(followed)).filter(followed=False).values(
+        'author_id').annotate(score=Count('id'))
+    position = _position(cursor, 2)
+    if position:
+        score, author_id = position
+        candidates = candidates.filter(
+            Q(score__lt=score) | Q(score=score, author_id__lt=author_id))
+    rows = list(candidates.order_by('-score', '-author_id')[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]['score'],
+                                     rows[-1]['author_id']])
+    return IdPage([row['author_id'] for row in rows], next_cursor)
@@ -0,0 +1,81 @@
+import os
+from collections import namedtuple
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, ImageOps
+
+from . import workers
+
+Processed = namedtuple('Processed', 'content extension width height')
+
+
+class ImageRejected(Exception):
+    """The upload is not an image that can be stored."""
+
+
+def process(data):
+    """Decode an uploaded image once and re-encode it for storage.
+
+    Runs in the worker processes. The image is turned upright and
+    downscaled to IMAGE_MAX_SIZE. It is saved without its metadata, as a
+    PNG if it has transparency and as a progressive JPEG otherwise.
+    """
+    try:
+        image = Image.open(BytesIO(data))
+        # the header is read first, so a bomb is refused before decoding
+        if image.width * image.height > settings.IMAGE_MAX_PIXELS:
+            raise ImageRejected('Изображение слишком большое')
+        image.load()
+    except Image.DecompressionBombError:
+        raise ImageRejected('Изображение слишком большое')
+    except (OSError, SyntaxError, ValueError):
+        raise ImageRejected('Загрузите правильное изображение')
+
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((settings.IMAGE_MAX_SIZE, settings.IMAGE_MAX_SIZE),
+                    Image.LANCZOS)
+    transparent = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info)
+    buffer = BytesIO()
+    if transparent:
+        image.save(buffer, 'PNG', optimize=True)
+        extension = 'png'
+    else:
+        image.convert('RGB').save(buffer, 'JPEG', optimize=True,
+                                  progressive=True,
+                                  quality=settings.IMAGE_JPEG_QUALITY)
+        extension = 'jpg'
+    return Processed(buffer.getvalue(), extension, image.width, image.height)
+
+
+def clean_upload(form, name, width_field, height_field):
+    """Replace a new upload in ``form`` with its processed version.
+
+    Meant to be called from ``clean_<name>()`` of a ModelForm; records
+    the dimensions on the form's instance.
+    """
+    upload = form.cleaned_data.get(name)
+    if upload is False:
+        setattr(form.instance, width_field, None)
+        setattr(form.instance, height_field, None)
+    if not isinstance(upload, UploadedFile):
+        return upload
+    upload.seek(0)
+    try:
+        processed = workers.run(process, upload.read())
+    except ImageRejected as error:
+        raise ValidationError(str(error), code='invalid_image')
+    except (TimeoutError, BrokenProcessPool):
+        raise ValidationError('Не удалось обработать изображение, '
+                              'попробуйте ещё раз', code='image_timeout')
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    setattr(form.instance, width_field, processed.width)
+    setattr(form.instance, height_field, processed.height)
+    return ContentFile(processed.content,
+                       name=f'{stem}.{processed.extension}')
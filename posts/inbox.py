@@ -0,0 +1,58 @@
+from django.db.models import Case, F, IntegerField, Q, When
+from django.db.models.functions import Greatest
+
+from .models import Chat
+
+
+def _unread_field(chat, user):
+    return 'user1_unread' if chat.user1_id == user.id else 'user2_unread'
+
+
+def message_sent(message):
+    """Move the chat up the inbox and count the message as unread."""
+    recipient = message.recipient_id
+    Chat.objects.filter(id=message.chat_id).update(
+        last_message=message,
+        last_message_at=message.msg_date,
+        user1_unread=Case(When(user1_id=recipient,
+                               then=F('user1_unread') + 1),
+                          default=F('user1_unread')),
+        user2_unread=Case(When(user2_id=recipient,
+                               then=F('user2_unread') + 1),
+                          default=F('user2_unread')),
+    )
+
+
+def messages_read(chat, user, number):
+    """Lower the unread count ``user`` sees for ``chat`` by ``number``."""
+    if number:
+        field = _unread_field(chat, user)
+        Chat.objects.filter(id=chat.id).update(
+            **{field: Greatest(F(field) - number, 0)})
+
+
+def message_removed(message):
+    if not message.is_readed and message.chat_id:
+        Chat.objects.filter(id=message.chat_id).update(
+            user1_unread=Case(When(user1_id=message.recipient_id,
+                                   then=Greatest(F('user1_unread') - 1, 0)),
+                              default=F('user1_unread')),
+            user2_unread=Case(When(user2_id=message.recipient_id,
+                                   then=Greatest(F('user2_unread') - 1, 0)),
+                              default=F('user2_unread')),
+        )
+
+
+def get_inbox(user):
+    """Chats of ``user`` with everything chatrooms.html shows preloaded.
+
+    ``unread`` holds the number of messages ``user`` has not read yet.
+    The newest conversations come first.
+    """
+    return Chat.objects.filter(Q(user1=user) | Q(user2=user)).select_related(
+        'user1__profile', 'user2__profile', 'last_message',
+    ).annotate(
+        unread=Case(When(user1=user, then=F('user1_unread')),
+                    default=F('user2_unread'),
+                    output_field=IntegerField()),
+    ).order_by('-last_message_at', '-id')
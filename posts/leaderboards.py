@@ -0,0 +1,75 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Group
+
+User = get_user_model()
+
+CACHE_KEY = 'leaderboards'
+LOCK_KEY = 'leaderboards:refreshing'
+
+
+def compute():
+    """Rank the most popular authors and groups."""
+    size = settings.LEADERBOARD_SIZE
+    authors = User.objects.annotate(
+        likes_count=Coalesce(Sum('posts__like_count'), 0),
+        comments_count=Coalesce(Sum('posts__comment_count'), 0),
+    ).order_by('-likes_count').values(
+        'username', 'first_name', 'last_name', 'profile__avatar',
+        'likes_count', 'comments_count')[:size]
+    groups = Group.objects.order_by('-post_count', '-id').values(
+        'slug', 'title', posts_count=F('post_count'))[:size]
+    return {
+        'authors': [
+            {'username': author['username'],
+             'full_name': f"{author['first_name']} "
+                          f"{author['last_name']}".strip(),
+             'avatar': author['profile__avatar'],
+             'likes_count': author['likes_count'],
+             'comments_count': author['comments_count']}
+            for author in authors
+        ],
+        'groups': list(groups),
+    }
+
+
+def refresh():
+    """Recompute the rankings and store them in the cache."""
+    try:
+        boards = compute()
+        fresh_until = time.time() + settings.LEADERBOARD_TTL
+        cache.set(CACHE_KEY, (boards, fresh_until),
+                  settings.LEADERBOARD_STALE_TTL)
+        return boards
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def _refresh_in_background():
+    try:
+        refresh()
+    finally:
+        connection.close()
+
+
+def get_leaderboards():
+    """Return cached rankings, serving stale ones while they are rebuilt.
+
+    Only a cold cache makes the caller wait for the aggregate queries.
+    """
+    cached = cache.get(CACHE_KEY)
+    if cached is None:
+        return refresh()
+    boards, fresh_until = cached
+    if fresh_until < time.time() and cache.add(
+            LOCK_KEY, True, settings.LEADERBOARD_TTL):
+        threading.Thread(target=_refresh_in_background, daemon=True).start()
+    return boards
@@ -0,0 +1,21 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Show cache hits and misses per key family'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Start counting again after showing them')
+
+    def handle(self, *args, **options):
+        if not hasattr(cache, 'metrics'):
+            raise CommandError('The cache backend does not count hits')
+        for family, (hits, misses) in cache.metrics().items():
+            total = hits + misses
+            ratio = hits / total if total else 0
+            self.stdout.write(f'{family}: {hits} hits, {misses} misses, '
+                              f'hit ratio {ratio:.0%}')
+        if options['reset']:
+            cache.reset_metrics()
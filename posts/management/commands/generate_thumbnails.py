@@ -0,0 +1,25 @@
+from concurrent.futures import wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails, workers
+from posts.models import Post
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = 'Generate the configured thumbnails of every stored image'
+
+    def handle(self, *args, **options):
+        renditions = settings.THUMBNAIL_RENDITIONS
+        images = [(name, 'post') for name in Post.objects.exclude(
+            image='').exclude(image=None).values_list(
+            'image', flat=True).distinct().iterator()]
+        images += [(name, 'avatar') for name in Profile.objects.values_list(
+            'avatar', flat=True).distinct().iterator()]
+        images += [(name, 'icon') for name in settings.THUMBNAIL_ICONS]
+        jobs = [workers.submit(thumbnails.generate, name, renditions[kind])
+                for name, kind in images]
+        wait([job for job in jobs if job is not None])
+        self.stdout.write(f'Images processed: {len(images)}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild unread event and message counters from source tables'
+
+    def handle(self, *args, **options):
+        fixed = counters.rebuild()
+        self.stdout.write(f'Counters fixed: {fixed}')
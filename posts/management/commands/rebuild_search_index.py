@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the post search index from scratch'
+
+    def handle(self, *args, **options):
+        indexed = search.rebuild()
+        self.stdout.write(f'Posts indexed: {indexed}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the follow feed timelines from follows'
+
+    def handle(self, *args, **options):
+        entries = timeline.rebuild()
+        self.stdout.write(f'Timeline entries: {entries}')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = ('Recount likes, dislikes and comments stored on posts, and '
+            'followers, followings and posts stored on profiles and groups')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=counters.RECOUNT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        fixed = counters.recount_posts(options['batch_size'])
+        self.stdout.write(f'Posts fixed: {fixed}')
+        fixed = counters.recount_profiles(options['batch_size'])
+        self.stdout.write(f'Profiles fixed: {fixed}')
+        fixed = counters.recount_groups(options['batch_size'])
+        self.stdout.write(f'Groups fixed: {fixed}')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Recompute popular authors and groups and store them in the cache'
+
+    def handle(self, *args, **options):
+        boards = leaderboards.refresh()
+        self.stdout.write(f"Authors: {len(boards['authors'])}, "
+                          f"groups: {len(boards['groups'])}")
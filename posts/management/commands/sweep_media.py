@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import storage
+
+
+class Command(BaseCommand):
+    help = ('Remove stored media no row refers to: released uploads and '
+            'files of rolled back saves')
+
+    def handle(self, *args, **options):
+        removed = storage.sweep()
+        self.stdout.write(f'Files removed: {removed}')
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_notificationcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_pinned=True), fields=['-pub_date'], name='post_pinned_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_auto_20261018_2003'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dislike',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='date published'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='follow',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='date published'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='like',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='date published'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['author', '-created'], name='follow_author_created_idx'),
+        ),
+    ]
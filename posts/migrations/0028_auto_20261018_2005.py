@@ -0,0 +1,17 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0027_event_created'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat', '-msg_date', '-id'], name='message_chat_date_idx'),
+        ),
+    ]
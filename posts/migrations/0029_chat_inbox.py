@@ -0,0 +1,53 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:06
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def fill_inbox(apps, schema_editor):
+    Chat = apps.get_model('posts', 'Chat')
+    Message = apps.get_model('posts', 'Message')
+    for chat in Chat.objects.all():
+        messages = Message.objects.filter(chat=chat)
+        last_message = messages.order_by('-msg_date', '-id').first()
+        if last_message is not None:
+            chat.last_message = last_message
+            chat.last_message_at = last_message.msg_date
+        unread = messages.filter(is_readed=False)
+        chat.user1_unread = unread.filter(recipient=chat.user1_id).count()
+        chat.user2_unread = unread.filter(recipient=chat.user2_id).count()
+        chat.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_auto_20261018_2005'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='user1_unread',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='user2_unread',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['user1', '-last_message_at', '-id'], name='chat_user1_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['user2', '-last_message_at', '-id'], name='chat_user2_inbox_idx'),
+        ),
+        migrations.RunPython(fill_inbox, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:06
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+def merge_duplicate_chats(apps, schema_editor):
+    """Keep one id-ordered chat per pair of users and move messages to it.
+
+    Chats of a user with themselves, made by the old signup for admin,
+    are deleted with their messages: chat_pair_ordered forbids them.
+    """
+    Chat = apps.get_model('posts', 'Chat')
+    Message = apps.get_model('posts', 'Message')
+    self_chats = Chat.objects.filter(user1=models.F('user2'))
+    Message.objects.filter(chat__in=self_chats).delete()
+    self_chats.delete()
+    kept = {}
+    for chat in Chat.objects.exclude(user1=None).exclude(user2=None).order_by(
+            'id'):
+        pair = tuple(sorted((chat.user1_id, chat.user2_id)))
+        if pair in kept:
+            Message.objects.filter(chat=chat).update(chat=kept[pair])
+            chat.delete()
+        else:
+            kept[pair] = chat
+
+    for (first, second), chat in kept.items():
+        messages = Message.objects.filter(chat=chat)
+        last_message = messages.order_by('-msg_date', '-id').first()
+        if last_message is not None:
+            chat.last_message = last_message
+            chat.last_message_at = last_message.msg_date
+        unread = messages.filter(is_readed=False)
+        chat.user1_id, chat.user2_id = first, second
+        chat.user1_unread = unread.filter(recipient=first).count()
+        chat.user2_unread = unread.filter(recipient=second).count()
+        chat.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0029_chat_inbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_chats, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='chat',
+            constraint=models.UniqueConstraint(fields=('user1', 'user2'), name='unique_chat_pair'),
+        ),
+        migrations.AddConstraint(
+            model_name='chat',
+            constraint=models.CheckConstraint(check=models.Q(user1__lt=django.db.models.expressions.F('user2')), name='chat_pair_ordered'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def index_existing_posts(apps, schema_editor):
+    """Index the posts written before the index existed, like
+    search.index_posts() does."""
+    from posts import search
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    posts = Post.objects.select_related('author', 'group').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(posts.filter(id__gt=last_id)[:search.BATCH_SIZE])
+        if not batch:
+            return
+        SearchTerm.objects.bulk_create(
+            [term for post in batch
+             for term in search.post_terms(post, SearchTerm)])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0030_unique_chat_pair'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=64)),
+                ('field', models.CharField(choices=[('t', 'Заголовок и текст'), ('a', 'Автор'), ('g', 'Группа')], max_length=1)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('post', 'field', 'term'), name='unique_post_term'),
+        ),
+        migrations.RunPython(index_existing_posts, migrations.RunPython.noop),
+    ]
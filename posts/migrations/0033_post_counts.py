@@ -0,0 +1,47 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:13
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    sources = {
+        'like_count': (apps.get_model('posts', 'Like'), 'publication'),
+        'dislike_count': (apps.get_model('posts', 'Dislike'), 'publication'),
+        'comment_count': (apps.get_model('posts', 'Comment'), 'post'),
+    }
+    counts = {}
+    for field, (model, lookup) in sources.items():
+        rows = model.objects.filter(**{lookup: OuterRef('pk')}).order_by(
+        ).values(lookup).annotate(total=Count('pk')).values('total')
+        counts[field] = Coalesce(
+            Subquery(rows, output_field=IntegerField()), 0)
+    Post.objects.update(**counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0032_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='dislike_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
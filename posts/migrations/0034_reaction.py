@@ -0,0 +1,104 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+LIKE, DISLIKE = 1, -1
+
+
+def _count(rows, lookup):
+    rows = rows.order_by().values(lookup).annotate(
+        total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def merge_reactions(apps, schema_editor):
+    """Copy likes and dislikes into reactions, one per user and post.
+
+    When a user has several rows for a post the earliest one is kept.
+    0027 stamped the rows of each table that existed then with one date,
+    the earliest the table has, so those dates do not tell which row came
+    first; the like is kept when one of the rows carries it.
+    """
+    Like = apps.get_model('posts', 'Like')
+    Dislike = apps.get_model('posts', 'Dislike')
+    Reaction = apps.get_model('posts', 'Reaction')
+    Post = apps.get_model('posts', 'Post')
+    NotificationCounter = apps.get_model('posts', 'NotificationCounter')
+    # keep the dates of the copied rows
+    Reaction._meta.get_field('created').auto_now_add = False
+
+    kept = {}
+    for model, value in ((Like, LIKE), (Dislike, DISLIKE)):
+        rows = model.objects.exclude(user=None).exclude(publication=None)
+        stamped = rows.aggregate(created=Min('created'))['created']
+        for row in rows.order_by('created', 'id').iterator():
+            key = (row.user_id, row.publication_id)
+            legacy = row.created == stamped
+            if key in kept:
+                reaction, kept_legacy = kept[key]
+                if (legacy or kept_legacy
+                        or row.created >= reaction.created):
+                    continue
+            kept[key] = (Reaction(user_id=row.user_id,
+                                  post_id=row.publication_id, value=value,
+                                  is_readed=row.is_readed,
+                                  created=row.created), legacy)
+    Reaction.objects.bulk_create(
+        [reaction for reaction, _ in kept.values()], batch_size=1000)
+
+    reactions = Reaction.objects.filter(post=OuterRef('pk'))
+    Post.objects.update(
+        like_count=_count(reactions.filter(value=LIKE), 'post'),
+        dislike_count=_count(reactions.filter(value=DISLIKE), 'post'),
+    )
+    unread = Reaction.objects.filter(post__author=OuterRef('user'),
+                                     is_readed=False)
+    NotificationCounter.objects.update(
+        likes=_count(unread.filter(value=LIKE), 'post__author'),
+        dislikes=_count(unread.filter(value=DISLIKE), 'post__author'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0033_post_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.SmallIntegerField(choices=[(1, 'Лайк'), (-1, 'Дизлайк')])),
+                ('is_readed', models.BooleanField(default=False)),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='date published')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(merge_reactions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='like',
+            name='publication',
+        ),
+        migrations.RemoveField(
+            model_name='like',
+            name='user',
+        ),
+        migrations.DeleteModel(
+            name='Dislike',
+        ),
+        migrations.DeleteModel(
+            name='Like',
+        ),
+        migrations.AddConstraint(
+            model_name='reaction',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_reaction'),
+        ),
+    ]
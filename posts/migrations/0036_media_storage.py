@@ -0,0 +1,47 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:21
+
+from django.db import migrations, models
+from django.db.models import Count
+import posts.storage
+
+
+def count_references(apps, schema_editor):
+    Blob = apps.get_model('posts', 'Blob')
+    Post = apps.get_model('posts', 'Post')
+    Profile = apps.get_model('users', 'Profile')
+    refs = {}
+    for model, field in ((Post, 'image'), (Profile, 'avatar')):
+        rows = model.objects.exclude(**{field: ''}).exclude(
+            **{f'{field}__isnull': True}).values(field).annotate(n=Count('pk'))
+        for row in rows:
+            refs[row[field]] = refs.get(row[field], 0) + row['n']
+    # the default avatar ships with the site and is never removed
+    refs.pop('default.jpg', None)
+    Blob.objects.bulk_create(
+        [Blob(name=name, refs=n) for name, n in refs.items()],
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0035_image_dimensions'),
+        ('users', '0007_image_dimensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refs', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=posts.storage.ContentAddressedStorage(), upload_to='users/'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
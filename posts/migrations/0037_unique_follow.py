@@ -0,0 +1,58 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:25
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def merge_duplicate_follows(apps, schema_editor):
+    """Keep the earliest follow of each pair and recount the unread ones.
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    NotificationCounter = apps.get_model('posts', 'NotificationCounter')
+    pairs = Follow.objects.exclude(user=None).exclude(author=None).values(
+        'user', 'author').annotate(n=Count('id')).filter(n__gt=1)
+    authors = set()
+    for pair in pairs:
+        follows = Follow.objects.filter(
+            user=pair['user'], author=pair['author']).order_by('id')
+        Follow.objects.filter(id__in=list(
+            follows.values_list('id', flat=True)[1:])).delete()
+        authors.add(pair['author'])
+    for author in authors:
+        NotificationCounter.objects.filter(user=author).update(
+            followers=Follow.objects.filter(author=author,
+                                            is_readed=False).count())
+
+
+def count(model, lookup):
+    rows = model.objects.filter(**{lookup: OuterRef('user')}).order_by(
+    ).values(lookup).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def fill_profile_counts(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    Profile = apps.get_model('users', 'Profile')
+    Profile.objects.update(follower_count=count(Follow, 'author'),
+                           following_count=count(Follow, 'user'),
+                           post_count=count(Post, 'author'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0036_media_storage'),
+        ('users', '0009_profile_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+        migrations.RunPython(fill_profile_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def delete_half_follows(apps, schema_editor):
+    """Drop follows missing their user or author and recount the rest."""
+    Follow = apps.get_model('posts', 'Follow')
+    NotificationCounter = apps.get_model('posts', 'NotificationCounter')
+    Profile = apps.get_model('users', 'Profile')
+    broken = Follow.objects.filter(models.Q(user=None) | models.Q(author=None))
+    users = set()
+    for user_id, author_id in broken.values_list('user_id', 'author_id'):
+        users.update({user_id, author_id} - {None})
+    broken.delete()
+    for user_id in users:
+        NotificationCounter.objects.filter(user=user_id).update(
+            followers=Follow.objects.filter(author=user_id,
+                                            is_readed=False).count())
+        Profile.objects.filter(user=user_id).update(
+            follower_count=Follow.objects.filter(author=user_id).count(),
+            following_count=Follow.objects.filter(user=user_id).count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0037_unique_follow'),
+        ('users', '0009_profile_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_half_follows, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='follow',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='following', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='follow',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follower', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['author', '-id'], name='follow_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['user', '-id'], name='follow_user_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:33
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_post_counts(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    rows = Post.objects.filter(group=OuterRef('pk')).order_by().values(
+        'group').annotate(total=Count('pk')).values('total')
+    Group.objects.update(post_count=Coalesce(
+        Subquery(rows, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0038_follow_graph'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['title', 'id'], name='group_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['-post_count', '-id'], name='group_popular_idx'),
+        ),
+        migrations.RunPython(fill_post_counts, migrations.RunPython.noop),
+    ]
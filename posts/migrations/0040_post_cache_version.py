@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0039_group_directory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='cache_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
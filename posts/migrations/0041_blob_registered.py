@@ -0,0 +1,19 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:50
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0040_post_cache_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='registered',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
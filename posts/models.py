@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+
+from .storage import media_storage
 
 User = get_user_model()
 
@@ -10,10 +13,39 @@ class Group(models.Model):
                              help_text='Введите название группы')
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'id'], name='group_title_idx'),
+            models.Index(fields=['-post_count', '-id'],
+                         name='group_popular_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # post_count is only changed with F() updates, like Post counters
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'post_count'
+            ]
+        super().save(*args, **kwargs)
+
+
+# fields changed only with F() updates; cache_version is bumped whenever
+# the rendered post card changes, see posts.cards
+COUNT_FIELDS = ('like_count', 'dislike_count', 'comment_count',
+                'cache_version')
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Load everything post_item.html shows without per-post queries."""
+        return self.select_related('author', 'author__profile', 'group')
+
 
 class Post(models.Model):
     title = models.CharField(max_length=200, blank=True, null=True,
@@ -30,15 +62,83 @@ class Post(models.Model):
                               verbose_name='Группа для поста',
                               help_text='Выберите группу'
                               )
-    image = models.ImageField(upload_to='users/', blank=True, null=True)
+    image = models.ImageField(upload_to='users/', storage=media_storage,
+                              blank=True, null=True)
+    image_width = models.PositiveIntegerField(blank=True, null=True,
+                                              editable=False)
+    image_height = models.PositiveIntegerField(blank=True, null=True,
+                                               editable=False)
     is_pinned = models.BooleanField(default=False)
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    dislike_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    cache_version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date'], name='post_pinned_idx',
+                         condition=models.Q(is_pinned=True)),
+            models.Index(fields=['-pub_date', '-id'], name='post_feed_idx',
+                         condition=models.Q(is_pinned=False)),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_feed_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_feed_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # the counters are only ever changed with F() updates, so saving
+        # a post loaded earlier must not write back their stale values
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNT_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class Blob(models.Model):
+    """A file of the media storage and the number of rows referring to it.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    refs = models.PositiveIntegerField(default=0)
+    # last saved by the storage; see posts.storage.register()
+    registered = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
+
+
+class SearchTerm(models.Model):
+    """A posting of the search index: a normalized term found in a post.
+    """
+    TEXT = 't'
+    AUTHOR = 'a'
+    GROUP = 'g'
+    FIELDS = (
+        (TEXT, 'Заголовок и текст'),
+        (AUTHOR, 'Автор'),
+        (GROUP, 'Группа'),
+    )
+
+    term = models.CharField(max_length=64, db_index=True)
+    field = models.CharField(max_length=1, choices=FIELDS)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name="search_terms")
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'field', 'term'],
+                                    name='unique_post_term'),
+        ]
+
 
 class Comment (models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
@@ -55,26 +155,89 @@ class Comment (models.Model):
 
 class Follow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,
-                             blank=True, null=True, related_name="follower")
+                             related_name="follower")
     author = models.ForeignKey(User, on_delete=models.CASCADE,
-                               blank=True, null=True, related_name="following")
+                               related_name="following")
     is_readed = models.BooleanField(default=False)
+    created = models.DateTimeField("date published", auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+        ]
+        indexes = [
+            models.Index(fields=['author', '-created'],
+                         name='follow_author_created_idx'),
+            # the follow graph pages through both directions by id
+            models.Index(fields=['author', '-id'], name='follow_author_idx'),
+            models.Index(fields=['user', '-id'], name='follow_user_idx'),
+        ]
+
 
+class Reaction(models.Model):
+    """A like or a dislike; a user has at most one reaction to a post."""
+    LIKE = 1
+    DISLIKE = -1
+    VALUES = (
+        (LIKE, 'Лайк'),
+        (DISLIKE, 'Дизлайк'),
+    )
 
-class Like(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,
-                             blank=True, null=True, related_name="liker")
-    publication = models.ForeignKey(Post, on_delete=models.CASCADE,
-                               blank=True, null=True, related_name="like")
+                             related_name="reactions")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name="reactions")
+    value = models.SmallIntegerField(choices=VALUES)
     is_readed = models.BooleanField(default=False)
+    created = models.DateTimeField("date published", auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_reaction'),
+        ]
 
 
-class Dislike(models.Model):
+class TimelineEntry(models.Model):
+    """A post delivered to the follow feed of one of its author's followers.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE,
-                             blank=True, null=True, related_name="disliker")
-    publication = models.ForeignKey(Post, on_delete=models.CASCADE,
-                               blank=True, null=True, related_name="dislike")
-    is_readed = models.BooleanField(default=False)
+                             related_name="timeline")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name="timeline_entries")
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name="+")
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_post'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_feed_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_author_idx'),
+        ]
+
+
+class ChatQuerySet(models.QuerySet):
+    def between(self, user, other):
+        """The dialog of two users; its participants are stored id-ordered.
+        """
+        first, second = sorted((user.id, other.id))
+        return self.filter(user1_id=first, user2_id=second)
+
+    def get_or_create_between(self, user, other):
+        """Return the dialog of two users, creating it if needed.
+
+        The unique pair constraint makes this safe under concurrent
+        requests: get_or_create() re-reads the row if its insert loses.
+        """
+        first, second = sorted((user.id, other.id))
+        return self.get_or_create(user1_id=first, user2_id=second)
 
 
 class Chat(models.Model):
@@ -85,6 +248,25 @@ class Chat(models.Model):
     last_message = models.OneToOneField('Message', on_delete=models.CASCADE,
                              blank=True, null=True,
                              related_name="last_message")
+    last_message_at = models.DateTimeField(default=timezone.now)
+    user1_unread = models.PositiveIntegerField(default=0)
+    user2_unread = models.PositiveIntegerField(default=0)
+
+    objects = ChatQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user1', 'user2'],
+                                    name='unique_chat_pair'),
+            models.CheckConstraint(check=models.Q(user1__lt=models.F('user2')),
+                                   name='chat_pair_ordered'),
+        ]
+        indexes = [
+            models.Index(fields=['user1', '-last_message_at', '-id'],
+                         name='chat_user1_inbox_idx'),
+            models.Index(fields=['user2', '-last_message_at', '-id'],
+                         name='chat_user2_inbox_idx'),
+        ]
 
 
 class Message(models.Model):
@@ -101,9 +283,26 @@ class Message(models.Model):
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE,
                              blank=True, null=True,
                              related_name="messages")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['chat', '-msg_date', '-id'],
+                         name='message_chat_date_idx'),
+        ]
+
     def __str__(self):
         return self.text[:40]
 
 
+class NotificationCounter(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                related_name="notification_counter")
+    comments = models.PositiveIntegerField(default=0)
+    followers = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    dislikes = models.PositiveIntegerField(default=0)
+    messages = models.PositiveIntegerField(default=0)
 
-
+    @property
+    def events(self):
+        return self.comments + self.followers + self.likes + self.dislikes
@@ -0,0 +1,174 @@
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def encode_cursor(data):
+    """Pack JSON-serializable ``data`` into an opaque URL-safe token."""
+    token = json.dumps(data).encode()
+    return base64.urlsafe_b64encode(token).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Unpack a token made by encode_cursor(); raise ValueError if bad."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+class CursorPage(Page):
+    """A page of a CursorPaginator; it has cursors instead of a number."""
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator(Paginator):
+    """Keyset pagination over a queryset.
+
+    Pages are addressed by opaque cursors holding the ordering values of
+    the first or last row shown, so every page costs one indexed range
+    scan no matter how deep it is. ``ordering`` must end with a unique
+    field and replaces any ordering ``object_list`` had. With
+    ``approximate_count`` the total is cached for PAGINATOR_COUNT_TTL
+    instead of counted on every request.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id'),
+                 approximate_count=False):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = tuple(ordering)
+        self.approximate_count = approximate_count
+
+    @cached_property
+    def count(self):
+        if not self.approximate_count:
+            return super().count
+        query = str(self.object_list.query).encode()
+        key = 'paginator_count:' + hashlib.md5(query).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.PAGINATOR_COUNT_TTL)
+        return count
+
+    def get_page(self, cursor):
+        """Return the page for ``cursor``, or the first one if it is bad."""
+        try:
+            return self.page(cursor)
+        except InvalidPage:
+            return self.page(None)
+
+    def page(self, cursor):
+        if not cursor:
+            return self._first_page()
+        values, backwards = self._decode(cursor)
+        if backwards:
+            return self._page_before(values)
+        return self._page_after(values)
+
+    def _first_page(self):
+        rows = list(self.object_list.order_by(*self.ordering)[
+            :self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self._encode(rows[-1], backwards=False)
+        return CursorPage(rows, self, next_cursor=next_cursor)
+
+    def _page_after(self, values):
+        rows = list(self.object_list.filter(
+            self._seek(values, backwards=False),
+        ).order_by(*self.ordering)[:self.per_page + 1])
+        next_cursor = previous_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self._encode(rows[-1], backwards=False)
+        if rows:
+            previous_cursor = self._encode(rows[0], backwards=True)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def _page_before(self, values):
+        reverse = [self._flip(name) for name in self.ordering]
+        rows = list(self.object_list.filter(
+            self._seek(values, backwards=True),
+        ).order_by(*reverse)[:self.per_page + 1])
+        next_cursor = previous_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            previous_cursor = self._encode(rows[-1], backwards=True)
+        rows.reverse()
+        if rows:
+            next_cursor = self._encode(rows[-1], backwards=False)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def _seek(self, values, backwards):
+        """Build the filter for rows that come after (or before) values."""
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            field = name.lstrip('-')
+            descending = name.startswith('-') != backwards
+            lookup = 'lt' if descending else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[position]})
+            for previous, value in zip(self.ordering[:position], values):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith('-') else '-' + name
+
+    def _fields(self):
+        fields = []
+        for name in self.ordering:
+            model = self.object_list.model
+            parts = name.lstrip('-').split('__')
+            for part in parts[:-1]:
+                model = model._meta.get_field(part).related_model
+            fields.append(model._meta.get_field(parts[-1]))
+        return fields
+
+    def _encode(self, row, backwards):
+        values = []
+        for name in self.ordering:
+            value = row
+            for part in name.lstrip('-').split('__'):
+                value = getattr(value, part)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        return encode_cursor([values, backwards])
+
+    def _decode(self, cursor):
+        try:
+            values, backwards = decode_cursor(cursor)
+            if (not isinstance(values, list)
+                    or len(values) != len(self.ordering)):
+                raise ValueError
+            values = [field.to_python(value)
+                      for field, value in zip(self._fields(), values)]
+            # to_python() passes None, which no lookup of _seek() takes
+            if None in values:
+                raise ValueError
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidPage('Invalid cursor')
+        return values, bool(backwards)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Post
+
+CACHE_KEY = 'pinned_posts'
+
+
+def get_pinned_ids():
+    """Return ids of pinned posts, newest first."""
+    ids = cache.get(CACHE_KEY)
+    if ids is None:
+        ids = list(Post.objects.filter(is_pinned=True).values_list(
+            'id', flat=True))
+        cache.set(CACHE_KEY, ids, settings.PINNED_POSTS_TTL)
+    return ids
+
+
+def get_pinned_posts():
+    ids = get_pinned_ids()
+    if not ids:
+        return []
+    return list(Post.objects.for_feed().filter(id__in=ids))
+
+
+def invalidate():
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,20 @@
+from django.db import transaction
+
+from .models import Reaction
+
+
+def toggle(user, post, value):
+    """Add the ``value`` reaction of ``user`` to ``post`` or take it back.
+
+    A like is not added over a dislike and vice versa; the other one has
+    to be taken back first. Returns the reaction left, or None. The
+    unique (user, post) key keeps double clicks from adding two rows.
+    """
+    with transaction.atomic():
+        deleted, _ = Reaction.objects.filter(
+            user=user, post=post, value=value).delete()
+        if deleted:
+            return None
+        reaction, _ = Reaction.objects.get_or_create(
+            user=user, post=post, defaults={'value': value})
+    return reaction
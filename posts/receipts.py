@@ -0,0 +1,34 @@
+from django.db import transaction
+
+from . import counters
+
+
+def mark_read(queryset, counter, user):
+    """Mark the unread rows of ``queryset`` as read with a single UPDATE.
+
+    Returns the rows that were unread, so the caller can still show them,
+    and lowers the ``counter`` field of ``user``'s notification counter
+    by the number of rows that were actually updated. Concurrent calls
+    may both return a row, but the conditional UPDATE counts it once.
+    """
+    model = queryset.model
+    rows = list(queryset.filter(is_readed=False))
+    if not rows:
+        return rows
+    with transaction.atomic():
+        updated = model.objects.filter(
+            pk__in=[row.pk for row in rows], is_readed=False,
+        ).update(is_readed=True)
+        counters.decrement(counter, updated, user=user)
+    for row in rows:
+        row.is_readed = True
+    return rows
+
+
+def mark_all_read(queryset, counter, user):
+    """Like mark_read(), but without loading the rows; returns their number.
+    """
+    with transaction.atomic():
+        updated = queryset.filter(is_readed=False).update(is_readed=True)
+        counters.decrement(counter, updated, user=user)
+    return updated
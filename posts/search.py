@@ -0,0 +1,191 @@
+import hashlib
+import re
+from collections import Counter
+from functools import reduce
+from operator import add, or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Q, Sum, Value, When
+
+from .models import Post, SearchTerm
+from .stemmer import stem
+
+TOKEN = re.compile(r'\w+')
+TERM_LENGTH = SearchTerm._meta.get_field('term').max_length
+TITLE_WEIGHT = 3
+TEXT_WEIGHT = 1
+NAME_WEIGHT = 2
+BATCH_SIZE = 500
+GENERATION_KEY = 'search:generation'
+
+STOP_WORDS = frozenset('''
+    а без бы в во вот вы да для до его ее же за и из или им их к как ко ли
+    мне мы на над не нет ни но о об он она они оно от по под при с со та так
+    те то ты у уже чем что это я
+'''.split())
+
+
+def tokenize(text):
+    """Split ``text`` into lowercase words with ё folded into е."""
+    return [token[:TERM_LENGTH]
+            for token in TOKEN.findall((text or '').lower().replace('ё', 'е'))]
+
+
+def terms(text):
+    """Return the stems of the meaningful words of ``text``."""
+    return [stem(token) for token in tokenize(text)
+            if token not in STOP_WORDS]
+
+
+def post_terms(post, model=SearchTerm):
+    """Build the unsaved postings of ``post``, one per term and field.
+
+    ``model`` is the SearchTerm class to build; migrations pass theirs.
+    """
+    weights = Counter()
+    for term in terms(post.title):
+        weights[SearchTerm.TEXT, term] += TITLE_WEIGHT
+    for term in terms(post.text):
+        weights[SearchTerm.TEXT, term] += TEXT_WEIGHT
+    if post.author_id:
+        for token in tokenize(post.author.username):
+            weights[SearchTerm.AUTHOR, token] = NAME_WEIGHT
+    if post.group_id:
+        for token in tokenize(post.group.title):
+            weights[SearchTerm.GROUP, token] = NAME_WEIGHT
+    return [model(post=post, field=field, term=term, weight=weight)
+            for (field, term), weight in weights.items()]
+
+
+def generation():
+    """Return the number of the current state of the index."""
+    cache.add(GENERATION_KEY, 1, None)
+    return cache.get(GENERATION_KEY, 1)
+
+
+def bump_generation():
+    """Make every cached result built before this call unreachable."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, None)
+
+
+def index_post(post):
+    """Replace the postings of ``post`` with ones for its current state."""
+    with transaction.atomic():
+        SearchTerm.objects.filter(post=post).delete()
+        SearchTerm.objects.bulk_create(post_terms(post))
+    bump_generation()
+
+
+def index_posts(posts):
+    """Reindex every post of the ``posts`` queryset in batches."""
+    posts = posts.select_related('author', 'group').order_by('id')
+    total = 0
+    last_id = 0
+    while True:
+        batch = list(posts.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            if total:
+                bump_generation()
+            return total
+        with transaction.atomic():
+            SearchTerm.objects.filter(post__in=batch).delete()
+            SearchTerm.objects.bulk_create(
+                [term for post in batch for term in post_terms(post)])
+        total += len(batch)
+        last_id = batch[-1].id
+
+
+def rebuild():
+    """Rebuild the whole index; return the number of posts indexed."""
+    SearchTerm.objects.all().delete()
+    return index_posts(Post.objects.all())
+
+
+def _is_stale(posts, field, name):
+    """Tell whether the ``field`` postings of ``posts`` miss ``name``."""
+    post = posts.order_by().first()
+    if post is None:
+        return False
+    indexed = set(post.search_terms.filter(field=field).values_list(
+        'term', flat=True))
+    return indexed != set(tokenize(name))
+
+
+def author_renamed(user):
+    if _is_stale(user.posts.all(), SearchTerm.AUTHOR, user.username):
+        index_posts(user.posts.all())
+
+
+def group_renamed(group):
+    if _is_stale(group.posts.all(), SearchTerm.GROUP, group.title):
+        index_posts(group.posts.all())
+
+
+def _conditions(query):
+    """One condition per query word: a text stem or a name prefix."""
+    conditions = []
+    for token in tokenize(query):
+        condition = Q(field__in=(SearchTerm.AUTHOR, SearchTerm.GROUP),
+                      term__startswith=token)
+        if token not in STOP_WORDS:
+            condition |= Q(field=SearchTerm.TEXT, term=stem(token))
+        conditions.append(condition)
+    return conditions
+
+
+def search(query):
+    """Rank the posts matching ``query``.
+
+    Returns ``{'post': id, 'matched': n, 'score': n}`` rows ordered by the
+    number of query words a post matches, then by the summed weight of
+    its matching postings, newest posts first on ties.
+    """
+    conditions = _conditions(query)
+    if not conditions:
+        return SearchTerm.objects.none().values('post')
+    matched = reduce(add, [
+        Max(Case(When(condition, then=Value(1)), default=Value(0),
+                 output_field=IntegerField()))
+        for condition in conditions
+    ])
+    return SearchTerm.objects.filter(reduce(or_, conditions)).values(
+        'post').annotate(matched=matched, score=Sum('weight')).order_by(
+        '-matched', '-score', '-post')
+
+
+def _cache_key(query):
+    normalized = ' '.join(tokenize(query)).encode()
+    return f'search:{generation()}:{hashlib.md5(normalized).hexdigest()}'
+
+
+def get_page(query, number, per_page):
+    """Return page ``number`` of the results, holding loaded posts.
+
+    The total and the post ids of each page are cached under the
+    normalized query for SEARCH_CACHE_TTL, so repeating a search only
+    loads the posts shown. Any change to the index starts a new
+    generation of keys.
+    """
+    key = _cache_key(query)
+    paginator = Paginator(search(query), per_page)
+    count = cache.get(f'{key}:count')
+    if count is None:
+        count = paginator.count
+        cache.set(f'{key}:count', count, settings.SEARCH_CACHE_TTL)
+    paginator.count = count
+    page = paginator.get_page(number)
+    page_key = f'{key}:{per_page}:{page.number}'
+    ids = cache.get(page_key)
+    if ids is None:
+        ids = [row['post'] for row in page.object_list]
+        cache.set(page_key, ids, settings.SEARCH_CACHE_TTL)
+    posts = Post.objects.for_feed().in_bulk(ids)
+    page.object_list = [posts[post_id] for post_id in ids
+                        if post_id in posts]
+    return page
@@ -0,0 +1,232 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import Profile
+
+from . import (cards, counters, inbox, pinned, search, storage, thumbnails,
+               timeline)
+from .models import Comment, Follow, Group, Message, Post, Reaction
+
+User = get_user_model()
+
+MEDIA_FIELDS = {Post: 'image', Profile: 'avatar'}
+# fields the post_save receivers compare with their value before the save
+SAVED_FIELDS = {Post: ('image', 'group_id'), Profile: ('avatar',)}
+# fields of the author shown on the post cards
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Profile)
+def remember_saved_values(sender, instance, **kwargs):
+    saved = None
+    if not instance._state.adding:
+        saved = sender.objects.filter(pk=instance.pk).values(
+            *SAVED_FIELDS[sender]).first()
+    instance._saved_values = saved or {}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Profile)
+def count_stored_file(sender, instance, update_fields=None, **kwargs):
+    field = MEDIA_FIELDS[sender]
+    if update_fields is not None and field not in update_fields:
+        return
+    name = getattr(instance, field).name or None
+    stored = instance._saved_values.get(field) or None
+    if name != stored:
+        storage.retain(name)
+        storage.release(stored)
+
+
+@receiver(post_save, sender=Post)
+def count_moved_post(sender, instance, created, raw=False, **kwargs):
+    saved_group = instance._saved_values.get('group_id')
+    if not created and not raw and saved_group != instance.group_id:
+        counters.adjust_group(saved_group, -1)
+        counters.adjust_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Profile)
+def release_stored_file(sender, instance, **kwargs):
+    storage.release(getattr(instance, MEDIA_FIELDS[sender]).name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_pinned_posts(sender, instance, **kwargs):
+    pinned.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def make_post_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw:
+        thumbnails.enqueue(instance.image, 'post')
+
+
+@receiver(post_save, sender=Profile)
+def make_avatar_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw:
+        thumbnails.enqueue(instance.avatar, 'avatar')
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def deliver_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    # the postings go with the post through the cascade
+    search.bump_generation()
+
+
+@receiver(post_save, sender=Group)
+def reindex_group(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        search.group_renamed(instance)
+
+
+@receiver(post_save, sender=User)
+def reindex_author(sender, instance, created, raw=False, update_fields=None,
+                   **kwargs):
+    if created or raw:
+        return
+    if update_fields is None or 'username' in update_fields:
+        search.author_renamed(instance)
+
+
+@receiver(post_save, sender=Post)
+def bump_edited_card(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        cards.bump_post(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def bump_group_cards(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        cards.bump(instance.posts.all())
+
+
+@receiver(post_save, sender=User)
+def bump_author_cards(sender, instance, created, raw=False,
+                      update_fields=None, **kwargs):
+    if created or raw:
+        return
+    if update_fields is None or CARD_USER_FIELDS & set(update_fields):
+        cards.bump(instance.posts.all())
+
+
+@receiver(post_save, sender=Profile)
+def bump_avatar_cards(sender, instance, created, raw=False, **kwargs):
+    stored = instance._saved_values.get('avatar') or None
+    if not created and not raw and (instance.avatar.name or None) != stored:
+        cards.bump(Post.objects.filter(author_id=instance.user_id))
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust_post(instance.post_id, 'comment_count', 1)
+    if created and not instance.is_readed and instance.post.author_id:
+        counters.increment(instance.post.author_id, 'comments')
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follower(sender, instance, created, **kwargs):
+    if created and not instance.is_readed and instance.author_id:
+        counters.increment(instance.author_id, 'followers')
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust_profile(instance.author_id, 'follower_count', 1)
+        counters.adjust_profile(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust_profile(instance.author_id, 'post_count', 1)
+        counters.adjust_group(instance.group_id, 1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.user_id and instance.author_id:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Reaction)
+def count_new_reaction(sender, instance, created, raw=False, **kwargs):
+    if not created:
+        return
+    counter, post_counter = counters.REACTION_FIELDS[instance.value]
+    if not raw:
+        counters.adjust_post(instance.post_id, post_counter, 1)
+    if not instance.is_readed and instance.post.author_id:
+        counters.increment(instance.post.author_id, counter)
+
+
+@receiver(post_save, sender=Message)
+def count_new_message(sender, instance, created, **kwargs):
+    if created and instance.chat_id:
+        inbox.message_sent(instance)
+    if created and not instance.is_readed and instance.recipient_id:
+        counters.increment(instance.recipient_id, 'messages')
+
+
+@receiver(post_delete, sender=Comment)
+def forget_comment(sender, instance, **kwargs):
+    counters.adjust_post(instance.post_id, 'comment_count', -1)
+    if not instance.is_readed:
+        counters.decrement('comments', user__posts=instance.post_id)
+
+
+@receiver(post_delete, sender=Follow)
+def forget_follower(sender, instance, **kwargs):
+    if not instance.is_readed:
+        counters.decrement('followers', user_id=instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def forget_follow(sender, instance, **kwargs):
+    counters.adjust_profile(instance.author_id, 'follower_count', -1)
+    counters.adjust_profile(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_delete, sender=Post)
+def forget_post(sender, instance, **kwargs):
+    counters.adjust_profile(instance.author_id, 'post_count', -1)
+    counters.adjust_group(instance.group_id, -1)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    if instance.user_id and instance.author_id:
+        timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Reaction)
+def forget_reaction(sender, instance, **kwargs):
+    counter, post_counter = counters.REACTION_FIELDS[instance.value]
+    counters.adjust_post(instance.post_id, post_counter, -1)
+    if not instance.is_readed:
+        counters.decrement(counter, user__posts=instance.post_id)
+
+
+@receiver(post_delete, sender=Message)
+def forget_message(sender, instance, **kwargs):
+    inbox.message_removed(instance)
+    if not instance.is_readed:
+        counters.decrement('messages', user_id=instance.recipient_id)
@@ -0,0 +1,78 @@
+"""A light Russian stemmer after the Snowball algorithm.
+
+It strips inflectional endings only, which is enough for words such as
+"котики", "котиков" and "котикам" to share one search term.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = re.compile(
+    r'((?<=[ая])(в|вши|вшись)|(ив|ивши|ившись|ыв|ывши|ывшись))$')
+REFLEXIVE = re.compile(r'(ся|сь)$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$')
+PARTICIPLE = re.compile(r'((?<=[ая])(ем|нн|вш|ющ|щ)|(ивш|ывш|ующ))$')
+VERB = re.compile(
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)|'
+    r'(ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|'
+    r'ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю))$')
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$')
+DERIVATIONAL = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+
+def _region(word, start=0):
+    """Index after the first non-vowel that follows a vowel from start."""
+    for position in range(start + 1, len(word)):
+        if word[position] not in VOWELS and word[position - 1] in VOWELS:
+            return position + 1
+    return len(word)
+
+
+def _strip(pattern, word):
+    stripped = pattern.sub('', word, count=1)
+    return stripped, stripped != word
+
+
+def _step1(rv):
+    rv, done = _strip(PERFECTIVE_GERUND, rv)
+    if done:
+        return rv
+    rv, _ = _strip(REFLEXIVE, rv)
+    rv, done = _strip(ADJECTIVE, rv)
+    if done:
+        rv, _ = _strip(PARTICIPLE, rv)
+        return rv
+    rv, done = _strip(VERB, rv)
+    if done:
+        return rv
+    rv, _ = _strip(NOUN, rv)
+    return rv
+
+
+def stem(word):
+    """Return the stem of a lowercase Russian ``word``; others pass as is.
+    """
+    for position, letter in enumerate(word):
+        if letter in VOWELS:
+            break
+    else:
+        return word
+    head, rv = word[:position + 1], word[position + 1:]
+    rv = _step1(rv)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    r2 = _region(word, _region(word))
+    derivational = DERIVATIONAL.search(rv)
+    if derivational and len(head) + derivational.start() >= r2:
+        rv = rv[:derivational.start()]
+    rv, done = _strip(SUPERLATIVE, rv)
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    elif not done and rv.endswith('ь'):
+        rv = rv[:-1]
+    return head + rv
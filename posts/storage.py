@@ -0,0 +1,174 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from sorl.thumbnail import delete as delete_thumbnails
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores each file once, under the SHA-256 digest of its content.
+
+    The directory of the name asked for is kept, the rest of it is
+    replaced: ``users/cat.jpg`` is saved as ``users/ab/abcd...ef.jpg``.
+    A name is never reused for other content, so its URL can be cached
+    forever. Files are shared between rows; they are only removed by
+    release() or sweep() once no row refers to them.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # the name is chosen by _save() once the content has been read
+        return name
+
+    def _save(self, name, content):
+        directory = self.path(posixpath.dirname(name))
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            digest = digest.hexdigest()
+            extension = os.path.splitext(name)[1].lower()
+            name = posixpath.join(posixpath.dirname(name), digest[:2],
+                                  digest + extension)
+            register(name)
+            path = self.path(name)
+            if os.path.exists(path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+
+media_storage = ContentAddressedStorage()
+
+
+# names _save() gives: <directory>/<2 digits of the digest>/<digest><ext>
+STORED_NAME = re.compile(r'(^|/)([0-9a-f]{2})/\2[0-9a-f]{62}(\.\w+)?$')
+SWEEP_BATCH_SIZE = 500
+
+
+def register(name):
+    """Start counting references to a file the storage has saved.
+
+    The registration time keeps the file from being removed for
+    MEDIA_UPLOAD_GRACE seconds, while the upload is not yet retained
+    by the row it is saved for.
+    """
+    from .models import Blob
+    Blob.objects.update_or_create(name=name,
+                                  defaults={'registered': timezone.now()})
+
+
+def retain(name):
+    """Count a new reference to the stored file ``name``.
+
+    Files the storage did not save, like the default avatar, are not
+    counted and so never removed.
+    """
+    from .models import Blob
+    if name:
+        Blob.objects.filter(name=name).update(refs=F('refs') + 1)
+
+
+def release(name):
+    """Drop a reference to ``name``; the last one removes the file.
+
+    The file and its thumbnails go once the transaction commits, and only
+    if no reference was added again in between. A file registered during
+    the grace period is left to sweep(). Names that were never retained,
+    like the default avatar, are left alone.
+    """
+    from .models import Blob
+    if not name:
+        return
+    Blob.objects.filter(name=name, refs__gt=0).update(refs=F('refs') - 1)
+    transaction.on_commit(lambda: remove(name, _grace_cutoff()))
+
+
+def remove(name, registered_before):
+    """Remove an unreferenced file registered before the given time.
+
+    The row goes with a single conditional DELETE, and the file only if
+    that DELETE took it. Both happen in one transaction, so an upload of
+    the same content waits in register() and then writes the file anew.
+    """
+    from .models import Blob
+    with transaction.atomic():
+        deleted, _ = Blob.objects.filter(
+            name=name, refs=0, registered__lte=registered_before).delete()
+        if deleted != 1:
+            return False
+        delete_thumbnails(name, delete_file=False)
+        media_storage.delete(name)
+    return True
+
+
+def sweep():
+    """Remove the files no row refers to; return how many were removed.
+
+    These are files released during the grace period of their upload,
+    files whose upload was rolled back together with its Blob row, and
+    uploads left half-written.
+    """
+    from .models import Blob
+    cutoff = _grace_cutoff()
+    removed = 0
+    names = []
+    for name in _stored_files(cutoff.timestamp()):
+        if name.endswith('.upload'):
+            media_storage.delete(name)
+            removed += 1
+        else:
+            names.append(name)
+    # a file without a row gets one, so that it goes through the same
+    # conditional delete as a released file
+    Blob.objects.bulk_create(
+        [Blob(name=name, registered=cutoff) for name in names],
+        batch_size=SWEEP_BATCH_SIZE, ignore_conflicts=True)
+    unreferenced = Blob.objects.filter(
+        refs=0, registered__lte=cutoff).values_list('name', flat=True)
+    for name in list(unreferenced):
+        if remove(name, cutoff):
+            removed += 1
+    return removed
+
+
+def _stored_files(modified_before):
+    """Names of the files saved by the storage, and of uploads left
+    half-written, last modified before the given timestamp."""
+    root = media_storage.location
+    for directory, subdirectories, files in os.walk(root):
+        if directory == root and 'cache' in subdirectories:
+            # thumbnails, removed with their source
+            subdirectories.remove('cache')
+        for file_name in files:
+            path = os.path.join(directory, file_name)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            if not (STORED_NAME.search(name) or name.endswith('.upload')):
+                continue
+            if os.path.getmtime(path) < modified_before:
+                yield name
+
+
+def _grace_cutoff():
+    return timezone.now() - timedelta(seconds=settings.MEDIA_UPLOAD_GRACE)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts import cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card(post):
+    """The part of a post shown the same to every viewer, from the cache."""
+    return cards.render(post)
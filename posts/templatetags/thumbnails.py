@@ -0,0 +1,11 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(file_, geometry):
+    """URL of a pre-generated thumbnail, or of a placeholder until it is."""
+    return thumbnails.url(file_, geometry)
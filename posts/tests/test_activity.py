@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import activity, counters
+from posts.models import Comment, Follow, Post, Reaction
+
+User = get_user_model()
+
+
+class ActivityTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.fans = [User.objects.create_user(username=f'fan{i}')
+                    for i in range(3)]
+        post = Post.objects.create(text='Текст', author=cls.author)
+        for fan in cls.fans:
+            Follow.objects.create(user=fan, author=cls.author)
+            Reaction.objects.create(user=fan, post=post,
+                                    value=Reaction.LIKE)
+            Comment.objects.create(post=post, author=fan, text='Класс')
+        Reaction.objects.create(user=cls.author, post=post,
+                                value=Reaction.DISLIKE)
+
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def test_windows_cover_all_events_newest_first(self):
+        seen = []
+        events, cursor = activity.get_timeline(self.author, size=4)
+        seen += events
+        while cursor:
+            events, cursor = activity.get_timeline(self.author, cursor, 4)
+            self.assertLessEqual(len(events), 4)
+            seen += events
+        self.assertEqual(len(seen), 10)
+        self.assertEqual(len({(e.kind, e.item.id) for e in seen}), 10)
+        dates = [event.created for event in seen]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertTrue(all(event.is_new for event in seen))
+
+    def test_each_table_is_read_up_to_the_window(self):
+        with CaptureQueriesContext(connection) as context:
+            activity.get_timeline(self.author, size=4)
+        union = context.captured_queries[0]['sql']
+        self.assertIn('UNION ALL', union)
+        # one limit per branch and one for the merged window
+        self.assertEqual(union.count('LIMIT 5'), len(activity.SOURCES) + 1)
+
+    def test_only_the_shown_window_is_marked_read(self):
+        url = reverse('posts:new_events', kwargs={'username': 'author'})
+        with mock.patch('posts.views.EVENTS_PAGE_SIZE', 4):
+            response = self.author_client.get(url)
+        events = response.context['events']
+        self.assertTrue(all(event.is_new for event in events))
+        counter = counters.get_counter(self.author)
+        self.assertEqual(counter.comments + counter.followers
+                         + counter.likes + counter.dislikes, 6)
+        unread = sum(model.objects.filter(is_readed=False).count()
+                     for model in (Comment, Follow, Reaction))
+        self.assertEqual(unread, 6)
+
+        with mock.patch('posts.views.EVENTS_PAGE_SIZE', 4):
+            response = self.author_client.get(
+                url, {'cursor': response.context['next_cursor']})
+        self.assertEqual(len(response.context['events']), 4)
+        self.assertTrue(all(e.is_new for e in response.context['events']))
+
+    def test_page_shows_summary_and_marks_everything_read(self):
+        response = self.author_client.get(reverse(
+            'posts:new_events', kwargs={'username': 'author'}))
+        counter = response.context['counter']
+        self.assertEqual((counter.comments, counter.followers,
+                          counter.likes, counter.dislikes), (3, 3, 3, 1))
+        self.assertEqual(len(response.context['events']), 10)
+        for model in (Comment, Follow, Reaction):
+            self.assertFalse(model.objects.filter(is_readed=False).exists())
+
+        response = self.author_client.get(reverse(
+            'posts:new_events', kwargs={'username': 'author'}))
+        self.assertEqual(response.context['counter'].likes, 0)
+        self.assertFalse(any(e.is_new for e in response.context['events']))
+
+    def test_rows_deleted_meanwhile_are_skipped(self):
+        in_bulk = QuerySet.in_bulk
+
+        def delete_first(queryset, ids):
+            # the comment goes after the window was read
+            if queryset.model is Comment:
+                Comment.objects.filter(id=min(ids)).delete()
+            return in_bulk(queryset, ids)
+
+        with mock.patch.object(QuerySet, 'in_bulk', autospec=True,
+                               side_effect=delete_first):
+            events, _ = activity.get_timeline(self.author, size=20)
+        self.assertEqual(len(events), 9)
@@ -0,0 +1,96 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.test import SimpleTestCase
+
+from yatube.cache import SQLiteCache, key_family
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = self.new_cache()
+
+    def new_cache(self, **options):
+        # a second instance stands in for another process
+        options.setdefault('METRICS_INTERVAL', 0)
+        return SQLiteCache(os.path.join(self.directory.name, 'cache.db'),
+                           {'OPTIONS': options})
+
+    def test_shared_between_instances(self):
+        self.cache.set('key', {'a': [1, 2]})
+        other = self.new_cache()
+        self.assertEqual(other.get('key'), {'a': [1, 2]})
+        self.assertFalse(other.add('key', 'new'))
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expiry(self):
+        with mock.patch('yatube.cache.time.time', return_value=1000):
+            self.cache.set('key', 'value', 10)
+            self.cache.set('forever', 'value', None)
+        with mock.patch('yatube.cache.time.time', return_value=1011):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'again', DEFAULT_TIMEOUT))
+            self.assertEqual(self.cache.get('forever'), 'value')
+
+    def test_incr(self):
+        self.cache.set('count', 1)
+        self.assertEqual(self.new_cache().incr('count', 5), 6)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_least_recently_used_are_evicted(self):
+        cache = self.new_cache(MAX_ENTRIES=10, CULL_FREQUENCY=5,
+                               METRICS_INTERVAL=3600, TOUCH_INTERVAL=5)
+        with mock.patch('yatube.cache.time.time') as now:
+            for i in range(10):
+                now.return_value = i
+                cache.set(f'key{i}', i, None)
+            now.return_value = 20
+            cache.get('key0')
+            for i in range(10, 12):
+                now.return_value = i + 10
+                cache.set(f'key{i}', i, None)
+            cache._cull()
+        self.assertEqual(cache.get('key0'), 0)
+        for i in range(1, 5):
+            self.assertIsNone(cache.get(f'key{i}'))
+        self.assertEqual(cache.get('key5'), 5)
+
+    def test_recent_use_is_not_written_again(self):
+        cache = self.new_cache(METRICS_INTERVAL=3600, TOUCH_INTERVAL=60)
+
+        def used():
+            return cache._db.execute(
+                'SELECT used FROM cache WHERE key = ?',
+                (cache.make_key('key'),)).fetchone()[0]
+
+        with mock.patch('yatube.cache.time.time') as now:
+            now.return_value = 100
+            cache.set('key', 'value', None)
+            now.return_value = 130
+            self.assertEqual(cache.get('key'), 'value')
+            self.assertEqual(used(), 100)
+            now.return_value = 200
+            cache.get('key')
+            self.assertEqual(used(), 200)
+
+    def test_metrics(self):
+        self.assertEqual(key_family('search:3:9f1c'), 'search')
+        self.assertEqual(key_family('sorl-thumbnail||image'), 'sorl-thumbnail')
+        self.assertEqual(key_family('template.cache.users_directory.9f1c'),
+                         'template.cache.users_directory')
+        self.cache.set('search:1', 'result')
+        self.cache.get('search:1')
+        self.cache.get('search:2')
+        self.cache.get_many(['pinned_posts', 'search:1'])
+        other = self.new_cache()
+        other.get('search:1')
+        self.assertEqual(self.cache.metrics(),
+                         {'pinned_posts': (0, 1), 'search': (3, 1)})
+        self.cache.reset_metrics()
+        self.assertEqual(other.metrics(), {})
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import cards, reactions
+from posts.models import Comment, Group, Post, Reaction
+
+User = get_user_model()
+
+
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        cache.reset_metrics()
+        self.post = Post.objects.create(text='Текст', author=self.author,
+                                        group=self.group)
+
+    def card(self):
+        return cards.render(Post.objects.for_feed().get(id=self.post.id))
+
+    def test_card_is_rendered_once(self):
+        with mock.patch('posts.cards.render_to_string',
+                        wraps=cards.render_to_string) as render:
+            first = self.card()
+            self.assertEqual(self.card(), first)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(cache.metrics()['post_card'], (1, 1))
+
+    def test_changes_shown_on_the_card_bump_its_version(self):
+        self.assertIn('Текст', self.card())
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assertIn('Новый текст', self.card())
+
+        reactions.toggle(self.reader, self.post, Reaction.LIKE)
+        self.assertIn('<span class="like-count">1</span>', self.card())
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        self.assertIn('Комментариев: 1', self.card())
+
+        self.group.title = 'Другая группа'
+        self.group.save()
+        self.assertIn('Другая группа', self.card())
+        self.author.first_name = 'Лев'
+        self.author.save()
+        self.assertIn('Лев', self.card())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.cache_version, 5)
+
+    def test_buttons_follow_the_viewer(self):
+        client = Client()
+        client.force_login(self.author)
+        edit_url = reverse('posts:post_edit',
+                           kwargs={'username': 'author',
+                                   'post_id': self.post.id})
+        self.assertContains(client.get(reverse('posts:index')), edit_url)
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:index'))
+        self.assertContains(response, 'Текст')
+        self.assertNotContains(response, edit_url)
+        self.assertEqual(cache.metrics()['post_card'][0], 1)
@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import inbox
+from posts.models import Chat, Message, NotificationCounter
+from posts.views import CHAT_PAGE_SIZE
+
+User = get_user_model()
+
+
+class ChatHistoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sender = User.objects.create_user(username='sender')
+        cls.recipient = User.objects.create_user(username='recipient')
+        cls.chat = Chat.objects.create(user1=cls.sender, user2=cls.recipient)
+        for i in range(CHAT_PAGE_SIZE + 5):
+            Message.objects.create(sender=cls.sender, recipient=cls.recipient,
+                                   chat=cls.chat, text=f'Сообщение {i}')
+
+        cls.recipient_client = Client()
+        cls.recipient_client.force_login(cls.recipient)
+
+    def unread(self):
+        return Message.objects.filter(chat=self.chat, is_readed=False)
+
+    def test_history_is_served_in_windows(self):
+        url = reverse('posts:chat', kwargs={'chat_id': self.chat.id})
+        response = self.recipient_client.get(url)
+        page = response.context['page']
+        self.assertEqual(len(page), CHAT_PAGE_SIZE)
+        self.assertEqual(page[0].text, f'Сообщение {CHAT_PAGE_SIZE + 4}')
+        # only the window shown is marked read
+        self.assertEqual(self.unread().count(), 5)
+        counter = NotificationCounter.objects.get(user=self.recipient)
+        self.assertEqual(counter.messages, 5)
+
+        response = self.recipient_client.get(url,
+                                             {'cursor': page.next_cursor})
+        older = response.context['page']
+        self.assertEqual([message.text for message in older],
+                         [f'Сообщение {i}' for i in range(4, -1, -1)])
+        self.assertFalse(self.unread().exists())
+
+    def test_message_get_redirects_to_chat(self):
+        response = self.recipient_client.get(
+            reverse('posts:message', kwargs={'chat_id': self.chat.id}))
+        self.assertRedirects(
+            response, reverse('posts:chat', kwargs={'chat_id': self.chat.id}))
+
+
+class InboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.owner = User.objects.create_user(username='owner')
+        cls.owner_client = Client()
+        cls.owner_client.force_login(cls.owner)
+
+    def start_chat(self, name):
+        friend = User.objects.create_user(username=name)
+        chat, _ = Chat.objects.get_or_create_between(friend, self.owner)
+        Message.objects.create(sender=friend, recipient=self.owner,
+                               chat=chat, text='Привет')
+        return chat
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.owner_client.get(reverse('posts:chatrooms'))
+        return response, len([query for query in context.captured_queries
+                              if 'thumbnail_kvstore' not in query['sql']])
+
+    def test_new_message_updates_chat(self):
+        chat = self.start_chat('friend')
+        chat.refresh_from_db()
+        self.assertEqual(chat.last_message.text, 'Привет')
+        self.assertEqual(chat.last_message_at, chat.last_message.msg_date)
+        # the owner was created first, so they are user1 of the pair
+        self.assertEqual((chat.user1_unread, chat.user2_unread), (1, 0))
+
+        self.owner_client.get(reverse('posts:chat',
+                                      kwargs={'chat_id': chat.id}))
+        chat.refresh_from_db()
+        self.assertEqual(chat.user1_unread, 0)
+
+    def test_inbox_renders_in_constant_queries(self):
+        self.start_chat('friend0')
+        _, one_chat = self.count_queries()
+        latest = self.start_chat('friend1')
+        self.start_chat('friend2')
+        response, queries = self.count_queries()
+        self.assertEqual(queries, one_chat)
+
+        chats = list(response.context['chatrooms'])
+        # newest dialog first
+        self.assertEqual(chats[1], latest)
+        self.assertEqual(chats[0].unread, 1)
+
+    def test_inbox_is_ordered_newest_first(self):
+        first = self.start_chat('friend0')
+        second = self.start_chat('friend1')
+        chats = inbox.get_inbox(self.owner)
+        self.assertTrue(chats.ordered)
+        self.assertEqual(list(chats), [second, first])
+
+
+class ChatPairTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.first = User.objects.create_user(username='first')
+        cls.second = User.objects.create_user(username='second')
+        cls.second_client = Client()
+        cls.second_client.force_login(cls.second)
+
+    def test_pair_has_one_chat_whatever_the_order(self):
+        chat, created = Chat.objects.get_or_create_between(self.second,
+                                                           self.first)
+        self.assertTrue(created)
+        self.assertEqual((chat.user1, chat.user2), (self.first, self.second))
+        same, created = Chat.objects.get_or_create_between(self.first,
+                                                           self.second)
+        self.assertFalse(created)
+        self.assertEqual(same, chat)
+        self.assertEqual(Chat.objects.between(self.second, self.first).get(),
+                         chat)
+
+    def test_create_chat_opens_existing_chat(self):
+        url = reverse('posts:create_chat', kwargs={'username': 'first'})
+        response = self.second_client.get(url)
+        chat = Chat.objects.between(self.first, self.second).get()
+        self.assertRedirects(
+            response, reverse('posts:chat', kwargs={'chat_id': chat.id}))
+        self.second_client.get(url)
+        self.assertEqual(
+            Chat.objects.between(self.first, self.second).count(), 1)
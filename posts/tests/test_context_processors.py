@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase
+
+from posts.models import Chat, Comment, Message, Post
+from yatube import context_processors
+
+User = get_user_model()
+
+
+class LazyContextProcessorsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        post = Post.objects.create(text='Текст', author=cls.author)
+        Comment.objects.create(post=post, author=cls.author, text='1')
+        reader = User.objects.create_user(username='reader')
+        chat, _ = Chat.objects.get_or_create_between(reader, cls.author)
+        Message.objects.create(sender=reader, recipient=cls.author,
+                               chat=chat, text='Привет')
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = LazyContextProcessorsTests.author
+
+    def tearDown(self):
+        cache.clear()
+
+    def build_context(self):
+        context = {}
+        for processor in (context_processors.popular,
+                          context_processors.unreaded_comments,
+                          context_processors.new_messages):
+            context.update(processor(self.request))
+        return context
+
+    def test_unused_values_cost_nothing(self):
+        with self.assertNumQueries(0):
+            context = self.build_context()
+            Template('{{ year }}').render(Context(context))
+
+    def test_values_are_loaded_once_per_request(self):
+        context = self.build_context()
+        template = Template(
+            '{{ new_events_count }} {{ new_messages_count }} '
+            '{% for group in popular_groups %}{% endfor %}'
+            '{% for user in popular_authors %}{% endfor %}')
+        # one counter lookup shared by both badges, one leaderboard build
+        with self.assertNumQueries(3):
+            rendered = template.render(Context(context))
+        self.assertEqual(rendered.split()[:2], ['1', '1'])
+
+        with self.assertNumQueries(0):
+            template.render(Context(context))
@@ -0,0 +1,186 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import (Chat, Comment, Follow, Message, NotificationCounter,
+                          Post, Reaction)
+from users.models import Profile
+
+User = get_user_model()
+
+
+class NotificationCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Текст', author=cls.author)
+
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def counter(self):
+        return NotificationCounter.objects.get(user=self.author)
+
+    def test_signals_keep_counter_up_to_date(self):
+        Comment.objects.create(post=self.post, author=self.reader, text='1')
+        Follow.objects.create(user=self.reader, author=self.author)
+        like = Reaction.objects.create(user=self.reader, post=self.post,
+                                       value=Reaction.LIKE)
+        self.assertEqual(self.counter().events, 3)
+
+        like.delete()
+        self.assertEqual(self.counter().likes, 0)
+        self.assertEqual(self.counter().events, 2)
+
+    def test_new_events_page_resets_counter(self):
+        Comment.objects.create(post=self.post, author=self.reader, text='1')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.author_client.get(reverse(
+            'posts:new_events', kwargs={'username': 'author'}))
+        self.assertEqual(self.counter().events, 0)
+
+    def test_context_processor_reads_one_row(self):
+        NotificationCounter.objects.filter(user=self.author).delete()
+        Comment.objects.create(post=self.post, author=self.reader, text='1')
+        chat, _ = Chat.objects.get_or_create_between(self.reader, self.author)
+        Message.objects.create(sender=self.reader, recipient=self.author,
+                               chat=chat, text='Привет')
+        response = self.author_client.get(reverse('about:author'))
+        self.assertEqual(response.context['new_events_count'], 1)
+        self.assertEqual(response.context['new_messages_count'], 1)
+
+    def test_rebuild_command_repairs_drift(self):
+        Comment.objects.create(post=self.post, author=self.reader, text='1')
+        NotificationCounter.objects.filter(user=self.author).update(
+            comments=10, likes=3)
+        call_command('rebuild_counters', stdout=StringIO())
+        counter = self.counter()
+        self.assertEqual(counter.comments, 1)
+        self.assertEqual(counter.likes, 0)
+
+
+class PostCountsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        self.post = Post.objects.create(text='Текст', author=self.author)
+
+    def counts(self):
+        self.post.refresh_from_db()
+        return (self.post.like_count, self.post.dislike_count,
+                self.post.comment_count)
+
+    def test_views_keep_counts(self):
+        url_kwargs = {'username': 'author', 'post_id': self.post.id}
+        self.reader_client.get(reverse('posts:like', kwargs=url_kwargs),
+                               HTTP_REFERER='/')
+        self.reader_client.post(reverse('posts:add_comment',
+                                        kwargs=url_kwargs), {'text': 'Да'})
+        self.assertEqual(self.counts(), (1, 0, 1))
+
+        self.reader_client.get(reverse('posts:like', kwargs=url_kwargs),
+                               HTTP_REFERER='/')
+        self.assertEqual(self.counts(), (0, 0, 1))
+
+    def test_cascading_deletes_are_counted(self):
+        other = User.objects.create_user(username='other')
+        Reaction.objects.create(user=other, post=self.post,
+                                value=Reaction.DISLIKE)
+        Comment.objects.create(post=self.post, author=other, text='Нет')
+        other.delete()
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_saving_a_loaded_post_keeps_counts(self):
+        stale = Post.objects.get(id=self.post.id)
+        Reaction.objects.create(user=self.reader, post=self.post,
+                                value=Reaction.LIKE)
+        stale.text = 'Правка'
+        stale.save()
+        self.assertEqual(self.counts(), (1, 0, 0))
+        self.assertEqual(self.post.text, 'Правка')
+
+    def test_recount_command_repairs_drift(self):
+        Reaction.objects.create(user=self.reader, post=self.post,
+                                value=Reaction.LIKE)
+        Post.objects.filter(id=self.post.id).update(like_count=5,
+                                                    comment_count=2)
+        out = StringIO()
+        call_command('recount_posts', batch_size=1, stdout=out)
+        self.assertEqual(out.getvalue().split('\n')[0], 'Posts fixed: 1')
+        self.assertEqual(self.counts(), (1, 0, 0))
+
+
+class ProfileCountsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def counts(self, user):
+        profile = Profile.objects.get(user=user)
+        return (profile.follower_count, profile.following_count,
+                profile.post_count)
+
+    def test_views_keep_counts(self):
+        self.reader_client.post(reverse('posts:new_post'), {'text': 'Текст'})
+        self.reader_client.get(reverse('posts:profile_follow',
+                                       args=['author']))
+        self.reader_client.get(reverse('posts:profile_follow',
+                                       args=['author']))
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 1)
+        self.assertEqual(self.counts(self.author), (1, 0, 0))
+        self.assertEqual(self.counts(self.reader), (0, 1, 1))
+
+        post = Post.objects.get(author=self.reader)
+        self.reader_client.get(reverse('posts:post_delete',
+                                       args=['reader', post.id]))
+        self.reader_client.get(reverse('posts:profile_unfollow',
+                                       args=['author']))
+        self.assertEqual(self.counts(self.author), (0, 0, 0))
+        self.assertEqual(self.counts(self.reader), (0, 0, 0))
+
+    def test_profile_page_counts_nothing(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        url = reverse('posts:profile', args=['author'])
+        # the first request builds the reader's notification counter
+        self.reader_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.reader_client.get(url)
+        self.assertTrue(response.context['is_follower'])
+        self.assertContains(response, 'Подписчиков: 1')
+        follow_counts = [query['sql'] for query in queries
+                         if 'COUNT' in query['sql']
+                         and 'posts_follow' in query['sql']]
+        self.assertEqual(follow_counts, [])
+
+    def test_saving_a_loaded_profile_keeps_counts(self):
+        stale = Profile.objects.get(user=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        stale.info = 'Обо мне'
+        stale.save()
+        self.assertEqual(self.counts(self.author), (1, 0, 0))
+
+    def test_recount_command_repairs_drift(self):
+        Post.objects.create(text='Текст', author=self.author)
+        Profile.objects.filter(user=self.author).update(post_count=0,
+                                                        follower_count=3)
+        out = StringIO()
+        call_command('recount_posts', stdout=out)
+        self.assertIn('Profiles fixed: 1', out.getvalue())
+        self.assertEqual(self.counts(self.author), (0, 0, 1))
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, Reaction
+
+User = get_user_model()
+
+
+class FeedQueriesTests(TestCase):
+    """Feeds must render in a constant number of queries."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def add_post(self):
+        post = Post.objects.create(text='Текст', author=self.author,
+                                   group=self.group)
+        Reaction.objects.create(user=self.reader, post=post,
+                                value=Reaction.LIKE)
+        Reaction.objects.create(user=self.author, post=post,
+                                value=Reaction.DISLIKE)
+        Comment.objects.create(post=post, author=self.reader, text='1')
+        return post
+
+    def count_queries(self, url):
+        self.reader_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.reader_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # thumbnail lookups are the thumbnail store's business
+        return len([query for query in context.captured_queries
+                    if 'thumbnail_kvstore' not in query['sql']])
+
+    def test_feeds_do_not_query_per_post(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_search') + '?query=Текст',
+        ]
+        self.add_post()
+        one_post = {url: self.count_queries(url) for url in urls}
+        for _ in range(3):
+            self.add_post()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), one_post[url])
+
+    def test_feed_annotations(self):
+        post = self.add_post()
+        response = self.reader_client.get(reverse('posts:index'))
+        feed_post = response.context['page'][0]
+        self.assertEqual(feed_post, post)
+        self.assertEqual(feed_post.like_count, 1)
+        self.assertEqual(feed_post.dislike_count, 1)
+        self.assertEqual(feed_post.comment_count, 1)
+
+
+class PinnedPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        for i in range(6):
+            Post.objects.create(text=f'Текст {i}', author=cls.author)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_pinned_posts_only_on_first_page(self):
+        pinned = Post.objects.create(text='Важно', author=self.author,
+                                     is_pinned=True)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['pinned_posts'], [pinned])
+        self.assertNotIn(pinned, response.context['page'])
+
+        cursor = response.context['page'].next_cursor
+        response = self.client.get(reverse('posts:index'), {'cursor': cursor})
+        self.assertEqual(response.context['pinned_posts'], [])
+        self.assertNotIn(pinned, response.context['page'])
+
+    def test_pinned_cache_is_invalidated_on_save(self):
+        self.client.get(reverse('posts:index'))
+        post = Post.objects.first()
+        post.is_pinned = True
+        post.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['pinned_posts'], [post])
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import graph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+@override_settings(GRAPH_PAGE_SIZE=2)
+class GraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {name: User.objects.create_user(username=name)
+                     for name in ('ann', 'bob', 'cat', 'dan', 'eve')}
+        for user, author in [('ann', 'bob'), ('ann', 'cat'), ('bob', 'ann'),
+                             ('bob', 'dan'), ('cat', 'dan'), ('cat', 'eve'),
+                             ('dan', 'ann'), ('bob', 'cat')]:
+            Follow.objects.create(user=cls.users[user],
+                                  author=cls.users[author])
+
+    def ids(self, *names):
+        return [self.users[name].id for name in names]
+
+    def read_all(self, query, user):
+        ids, cursor = [], None
+        while True:
+            page = query(self.users[user].id, cursor)
+            ids += page.ids
+            cursor = page.next_cursor
+            if cursor is None:
+                return ids
+
+    def test_followers_and_followees(self):
+        page = graph.followers(self.users['ann'].id)
+        self.assertEqual(page.ids, self.ids('dan', 'bob'))
+        self.assertIsNone(page.next_cursor)
+        self.assertEqual(self.read_all(graph.followees, 'bob'),
+                         self.ids('cat', 'dan', 'ann'))
+
+    def test_mutuals(self):
+        self.assertEqual(self.read_all(graph.mutuals, 'ann'),
+                         self.ids('bob'))
+
+    def test_suggestions(self):
+        # dan is followed by both bob and cat, eve by cat only
+        self.assertEqual(graph.suggestions(self.users['ann'].id).ids,
+                         self.ids('dan', 'eve'))
+        self.assertEqual(self.read_all(graph.suggestions, 'ann'),
+                         self.ids('dan', 'eve'))
+        page = graph.suggestions(self.users['ann'].id, limit=1)
+        self.assertEqual(graph.suggestions(
+            self.users['ann'].id, page.next_cursor).ids, self.ids('eve'))
+
+    def test_bad_cursor_starts_over(self):
+        page = graph.followers(self.users['ann'].id, 'not a cursor')
+        self.assertEqual(page.ids, self.ids('dan', 'bob'))
+
+    def test_follow_is_unique(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.users['ann'],
+                                  author=self.users['bob'])
+
+    def test_pages_list_the_graph(self):
+        client = Client()
+        client.force_login(self.users['ann'])
+        response = client.get(reverse('posts:followers',
+                                      kwargs={'username': 'ann'}))
+        self.assertEqual(response.context['users'],
+                         [self.users['dan'], self.users['bob']])
+        response = client.get(reverse('posts:mutuals',
+                                      kwargs={'username': 'ann'}))
+        self.assertEqual(response.context['users'], [self.users['bob']])
+        response = client.get(reverse('posts:following',
+                                      kwargs={'username': 'bob'}))
+        self.assertContains(response, '@ dan')
+
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggested'],
+                         [self.users['dan'], self.users['eve']])
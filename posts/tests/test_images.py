@@ -0,0 +1,82 @@
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from posts import images, workers
+from posts.forms import PostForm
+
+
+def upload(size, mode='RGB', fmt='JPEG', **options):
+    buffer = BytesIO()
+    Image.new(mode, size).save(buffer, fmt, **options)
+    return SimpleUploadedFile(f'photo.{fmt.lower()}', buffer.getvalue(),
+                              content_type=f'image/{fmt.lower()}')
+
+
+@override_settings(WORKER_PROCESSES=0, IMAGE_MAX_SIZE=100,
+                   IMAGE_MAX_PIXELS=1000 * 1000)
+class ImageTests(TestCase):
+    def test_downscaled_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # orientation: rotated 90 degrees
+        exif[0x010f] = 'Camera'
+        result = images.process(
+            upload((400, 200), exif=exif.tobytes()).read())
+        self.assertEqual((result.width, result.height), (50, 100))
+        self.assertEqual(result.extension, 'jpg')
+        image = Image.open(BytesIO(result.content))
+        self.assertEqual(image.size, (50, 100))
+        self.assertEqual(len(image.getexif()), 0)
+
+    def test_transparency_kept(self):
+        result = images.process(upload((10, 10), 'RGBA', 'PNG').read())
+        self.assertEqual(result.extension, 'png')
+        self.assertEqual(Image.open(BytesIO(result.content)).mode, 'RGBA')
+
+    def test_rejected(self):
+        with self.assertRaises(images.ImageRejected):
+            images.process(upload((2000, 1000), 'L', 'PNG').read())
+        with self.assertRaises(images.ImageRejected):
+            images.process(b'not an image')
+
+    def test_form(self):
+        form = PostForm({'text': 'Текст'},
+                        {'image': upload((300, 150), fmt='PNG')})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['image'].name, 'photo.jpg')
+        self.assertEqual(
+            (form.instance.image_width, form.instance.image_height),
+            (100, 50))
+
+        form = PostForm({'text': 'Текст'},
+                        {'image': upload((2000, 1000), 'L', 'PNG')})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    def test_form_when_workers_fail(self):
+        for error in (TimeoutError, BrokenProcessPool):
+            with self.subTest(error=error), \
+                    mock.patch('posts.images.workers.run',
+                               side_effect=error):
+                form = PostForm({'text': 'Текст'},
+                                {'image': upload((300, 150))})
+                self.assertFalse(form.is_valid())
+                self.assertEqual(form.errors.as_data()['image'][0].code,
+                                 'image_timeout')
+
+
+@override_settings(WORKER_PROCESSES=2)
+class WorkerPoolTests(TestCase):
+    def test_broken_pool_is_replaced(self):
+        pool = mock.Mock()
+        pool.submit.return_value.result.side_effect = BrokenProcessPool
+        with mock.patch.object(workers, '_pool', pool):
+            with self.assertRaises(BrokenProcessPool):
+                workers.run(images.process, b'')
+            self.assertIsNone(workers._pool)
+        pool.shutdown.assert_called_once_with(wait=False)
@@ -0,0 +1,53 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts import leaderboards
+from posts.models import Group, Post, Reaction
+
+User = get_user_model()
+
+
+class LeaderboardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author',
+                                              first_name='Лев',
+                                              last_name='Толстой')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        post = Post.objects.create(text='Текст', author=cls.author,
+                                   group=cls.group)
+        Reaction.objects.create(user=cls.author, post=post,
+                                value=Reaction.LIKE)
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_rankings_are_served_from_cache(self):
+        boards = leaderboards.get_leaderboards()
+        self.assertEqual(boards['authors'][0]['username'], 'author')
+        self.assertEqual(boards['authors'][0]['full_name'], 'Лев Толстой')
+        self.assertEqual(boards['authors'][0]['likes_count'], 1)
+        self.assertEqual(boards['groups'][0]['slug'], 'group')
+
+        with self.assertNumQueries(0):
+            leaderboards.get_leaderboards()
+
+    def test_stale_rankings_are_served_while_refreshing(self):
+        stale = {'authors': [], 'groups': []}
+        cache.set(leaderboards.CACHE_KEY, (stale, time.time() - 1))
+        with mock.patch('posts.leaderboards.threading.Thread') as thread:
+            with self.assertNumQueries(0):
+                self.assertEqual(leaderboards.get_leaderboards(), stale)
+            # a second request must not start another refresh
+            leaderboards.get_leaderboards()
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
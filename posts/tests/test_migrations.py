@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+
+class MigrationTests(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+
+class ChatPairMigrationTests(MigrationTests):
+    before = [('posts', '0029_chat_inbox')]
+    after = [('posts', '0030_unique_chat_pair')]
+
+    def test_self_chats_are_dropped(self):
+        apps = self.migrate(self.before)
+        User = apps.get_model('auth', 'User')
+        Chat = apps.get_model('posts', 'Chat')
+        Message = apps.get_model('posts', 'Message')
+        admin = User.objects.create(username='admin')
+        other = User.objects.create(username='other')
+        self_chat = Chat.objects.create(user1=admin, user2=admin)
+        Message.objects.create(sender=admin, recipient=admin, text='Привет',
+                               chat=self_chat)
+        # stored in reverse order and twice
+        Chat.objects.create(user1=other, user2=admin)
+        Chat.objects.create(user1=admin, user2=other)
+
+        apps = self.migrate(self.after)
+        Chat = apps.get_model('posts', 'Chat')
+        self.assertEqual(
+            list(Chat.objects.values_list('user1', 'user2')),
+            [(admin.id, other.id)])
+        self.assertFalse(apps.get_model('posts', 'Message').objects.exists())
+
+
+class SearchIndexMigrationTests(MigrationTests):
+    before = [('posts', '0030_unique_chat_pair')]
+    after = [('posts', '0031_searchterm')]
+
+    def test_existing_posts_are_indexed(self):
+        apps = self.migrate(self.before)
+        User = apps.get_model('auth', 'User')
+        Group = apps.get_model('posts', 'Group')
+        Post = apps.get_model('posts', 'Post')
+        author = User.objects.create(username='leo')
+        group = Group.objects.create(title='Книги', slug='books',
+                                     description='Описание')
+        post = Post.objects.create(title='Война', text='Война и мир',
+                                   author=author, group=group)
+
+        apps = self.migrate(self.after)
+        SearchTerm = apps.get_model('posts', 'SearchTerm')
+        self.assertEqual(
+            set(SearchTerm.objects.filter(post_id=post.id)
+                .values_list('field', 'term', 'weight')),
+            {('t', 'войн', 4), ('t', 'мир', 1), ('a', 'leo', 2),
+             ('g', 'книги', 2)})
+
+
+class ReactionMigrationTests(MigrationTests):
+    before = [('posts', '0033_post_counts')]
+    after = [('posts', '0034_reaction')]
+
+    def test_like_wins_over_backfilled_dates(self):
+        apps = self.migrate(self.before)
+        User = apps.get_model('auth', 'User')
+        Post = apps.get_model('posts', 'Post')
+        Like = apps.get_model('posts', 'Like')
+        Dislike = apps.get_model('posts', 'Dislike')
+        legacy = User.objects.create(username='legacy')
+        recent = User.objects.create(username='recent')
+        post = Post.objects.create(text='Текст', author=legacy)
+        for user in (legacy, recent):
+            Like.objects.create(user=user, publication=post)
+            Dislike.objects.create(user=user, publication=post)
+        # 0027 gave the older rows of each table one date, dislikes first
+        stamped = timezone.now() - timedelta(days=30)
+        Dislike.objects.filter(user=legacy).update(created=stamped)
+        Like.objects.filter(user=legacy).update(
+            created=stamped + timedelta(seconds=1))
+        # later rows have real dates: this dislike came first
+        Dislike.objects.filter(user=recent).update(
+            created=stamped + timedelta(days=1))
+        Like.objects.filter(user=recent).update(
+            created=stamped + timedelta(days=2))
+
+        apps = self.migrate(self.after)
+        Reaction = apps.get_model('posts', 'Reaction')
+        self.assertEqual(
+            dict(Reaction.objects.values_list('user_id', 'value')),
+            {legacy.id: 1, recent.id: -1})
+        post = apps.get_model('posts', 'Post').objects.get(id=post.id)
+        self.assertEqual((post.like_count, post.dislike_count), (1, 1))
@@ -0,0 +1,87 @@
+import warnings
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import UnorderedObjectListWarning
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.paginators import CursorPaginator, encode_cursor
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        for i in range(12):
+            Post.objects.create(text=f'Текст {i}', author=cls.author)
+        # equal dates make the id tiebreaker do the work
+        post = Post.objects.first()
+        Post.objects.update(pub_date=post.pub_date)
+        cls.expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_walk_forward_and_back(self):
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        first = paginator.get_page(None)
+        second = paginator.get_page(first.next_cursor)
+        third = paginator.get_page(second.next_cursor)
+        self.assertEqual(list(first) + list(second) + list(third),
+                         self.expected)
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+        self.assertEqual(len(third), 2)
+
+        back = paginator.get_page(third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        back = paginator.get_page(back.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_bad_cursor_gives_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        page = paginator.get_page('garbage')
+        self.assertEqual(list(page), self.expected[:5])
+
+    def test_tampered_cursor_gives_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        for data in ([[None, None], False], [['2020-01-01'], False],
+                     [['date', 1], False], [{'a': 1, 'b': 2}, True], 7):
+            with self.subTest(data=data):
+                page = paginator.get_page(encode_cursor(data))
+                self.assertEqual(list(page), self.expected[:5])
+        response = self.client.get(reverse('posts:index'), {
+            'cursor': encode_cursor([[None, None], False])})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unordered_queryset_is_ordered(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            paginator = CursorPaginator(Post.objects.order_by(), 5)
+        page = paginator.get_page(None)
+        self.assertEqual(list(page), self.expected[:5])
+        self.assertEqual(list(paginator.get_page(page.next_cursor)),
+                         self.expected[5:10])
+
+    def test_approximate_count_is_cached(self):
+        paginator = CursorPaginator(Post.objects.all(), 5,
+                                    approximate_count=True)
+        self.assertEqual(paginator.count, 12)
+        Post.objects.create(text='Новый', author=self.author)
+        paginator = CursorPaginator(Post.objects.all(), 5,
+                                    approximate_count=True)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 12)
+
+    def test_feed_follows_cursor(self):
+        response = self.client.get(reverse('posts:index'))
+        cursor = response.context['page'].next_cursor
+        response = self.client.get(reverse('posts:index'),
+                                   {'cursor': cursor})
+        self.assertEqual(list(response.context['page']), self.expected[5:10])
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import reactions
+from posts.models import NotificationCounter, Post, Reaction
+
+User = get_user_model()
+
+
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        self.post = Post.objects.create(text='Текст', author=self.author)
+        self.url_kwargs = {'username': 'author', 'post_id': self.post.id}
+
+    def counts(self):
+        self.post.refresh_from_db()
+        return self.post.like_count, self.post.dislike_count
+
+    def test_toggle(self):
+        reaction = reactions.toggle(self.reader, self.post, Reaction.LIKE)
+        self.assertEqual(reaction.value, Reaction.LIKE)
+        self.assertEqual(self.counts(), (1, 0))
+        # a dislike is not put over a like
+        reaction = reactions.toggle(self.reader, self.post, Reaction.DISLIKE)
+        self.assertEqual(reaction.value, Reaction.LIKE)
+        self.assertEqual(self.counts(), (1, 0))
+
+        self.assertIsNone(reactions.toggle(self.reader, self.post,
+                                           Reaction.LIKE))
+        self.assertEqual(self.counts(), (0, 0))
+        self.assertEqual(NotificationCounter.objects.get(
+            user=self.author).likes, 0)
+
+    def test_one_reaction_per_user_and_post(self):
+        Reaction.objects.create(user=self.reader, post=self.post,
+                                value=Reaction.LIKE)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Reaction.objects.create(user=self.reader, post=self.post,
+                                    value=Reaction.DISLIKE)
+
+    def test_redirect_views(self):
+        response = self.reader_client.get(
+            reverse('posts:dislike', kwargs=self.url_kwargs))
+        self.assertRedirects(response,
+                             reverse('posts:post', kwargs=self.url_kwargs))
+        self.assertEqual(self.counts(), (0, 1))
+
+    def test_json_endpoint(self):
+        url = reverse('posts:react', kwargs=self.url_kwargs)
+        response = self.reader_client.post(url, {'value': 'like'})
+        self.assertEqual(response.json(), {
+            'reaction': 'like', 'like_count': 1, 'dislike_count': 0})
+        response = self.reader_client.post(url, {'value': 'like'})
+        self.assertEqual(response.json(), {
+            'reaction': None, 'like_count': 0, 'dislike_count': 0})
+
+        self.assertEqual(self.reader_client.post(
+            url, {'value': 'love'}).status_code, 400)
+        self.assertEqual(self.reader_client.get(url).status_code, 405)
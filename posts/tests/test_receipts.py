@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import receipts
+from posts.models import Comment, NotificationCounter, Post
+
+User = get_user_model()
+
+
+class ReadReceiptsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Текст', author=cls.author)
+
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def add_comments(self, number):
+        for i in range(number):
+            Comment.objects.create(post=self.post, author=self.reader,
+                                   text=str(i))
+
+    def mark_read(self):
+        with CaptureQueriesContext(connection) as context:
+            rows = receipts.mark_read(
+                Comment.objects.filter(post=self.post), 'comments',
+                self.author)
+        return rows, len(context.captured_queries)
+
+    def test_one_update_whatever_the_number_of_rows(self):
+        self.add_comments(1)
+        rows, one_row_queries = self.mark_read()
+        self.assertEqual(len(rows), 1)
+
+        self.add_comments(5)
+        rows, queries = self.mark_read()
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(all(row.is_readed for row in rows))
+        self.assertEqual(queries, one_row_queries)
+
+        rows, _ = self.mark_read()
+        self.assertEqual(rows, [])
+        self.assertFalse(Comment.objects.filter(is_readed=False).exists())
+
+    def test_post_page_clears_comment_badge(self):
+        self.add_comments(3)
+        self.author_client.get(reverse(
+            'posts:post', kwargs={'username': 'author',
+                                  'post_id': self.post.id}))
+        counter = NotificationCounter.objects.get(user=self.author)
+        self.assertEqual(counter.comments, 0)
@@ -0,0 +1,148 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import autocomplete, search
+from posts.models import Group, Post, SearchTerm
+from posts.stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_a_stem(self):
+        self.assertEqual({stem(word) for word in
+                          ('котики', 'котиков', 'котикам')}, {'котик'})
+        self.assertEqual(stem('красивейший'), stem('красивая'))
+
+    def test_non_russian_words_are_kept(self):
+        self.assertEqual(stem('django'), 'django')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo_tolstoy')
+        cls.group = Group.objects.create(title='Котики', slug='cats',
+                                         description='Всё о котиках')
+        cls.both = Post.objects.create(
+            author=cls.author, title='Рыжие котики',
+            text='Рыжий кот ловит мышей')
+        cls.one = Post.objects.create(
+            author=cls.author, text='Про рыжую лису')
+        cls.other = Post.objects.create(
+            author=cls.author, group=cls.group, text='Собака во дворе')
+        cls.reader = Client()
+
+    def found(self, query):
+        return [row['post'] for row in search.search(query)]
+
+    def test_ranks_by_matched_words(self):
+        found = self.found('рыжий котик')
+        self.assertEqual(found[0], self.both.id)
+        self.assertCountEqual(found[1:], [self.one.id, self.other.id])
+
+    def test_yo_is_folded(self):
+        Post.objects.create(author=self.author, text='Ёжик в тумане')
+        self.assertEqual(len(self.found('ежики')), 1)
+
+    def test_prefix_matches_author_and_group(self):
+        self.assertEqual(len(self.found('leo')), 3)
+        self.assertEqual(self.found('кот')[0], self.other.id)
+
+    def test_index_follows_changes(self):
+        post = Post.objects.get(id=self.one.id)
+        post.text = 'Про серого волка'
+        post.save()
+        self.assertNotIn(post.id, self.found('лиса'))
+        self.assertIn(post.id, self.found('волки'))
+
+        group = Group.objects.get(id=self.group.id)
+        group.title = 'Собачки'
+        group.save()
+        self.assertEqual(self.found('собач'), [self.other.id])
+
+        author = User.objects.get(id=self.author.id)
+        author.username = 'tolstoy'
+        author.save()
+        self.assertEqual(len(self.found('tols')), 3)
+
+        Post.objects.get(id=self.other.id).delete()
+        self.assertFalse(SearchTerm.objects.filter(
+            post_id=self.other.id).exists())
+
+    def test_rebuild(self):
+        SearchTerm.objects.all().delete()
+        self.assertEqual(search.rebuild(), 3)
+        self.assertEqual(self.found('лиса'), [self.one.id])
+
+    def test_search_page(self):
+        response = self.reader.get(reverse('posts:post_search'),
+                                   {'query': 'рыжие'})
+        page = response.context['page']
+        self.assertEqual(page.paginator.count, 2)
+        self.assertEqual(page[0], self.both)
+
+
+class SearchCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        for i in range(7):
+            Post.objects.create(author=cls.author, text=f'Котик номер {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeated_search_only_loads_posts(self):
+        search.get_page('котики', 2, 5)
+        with self.assertNumQueries(1):
+            page = search.get_page('  Котики ', 2, 5)
+        self.assertEqual(len(page), 2)
+        self.assertEqual(page.paginator.count, 7)
+
+    def test_post_changes_start_a_new_generation(self):
+        self.assertEqual(search.get_page('котик', 1, 5).paginator.count, 7)
+        post = Post.objects.create(author=self.author, text='Ещё котик')
+        self.assertEqual(search.get_page('котик', 1, 5).paginator.count, 8)
+        post.delete()
+        self.assertEqual(search.get_page('котик', 1, 5).paginator.count, 7)
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='kotofey')
+        cls.group = Group.objects.create(title='Котики', slug='cats',
+                                         description='Коты')
+        Post.objects.create(author=cls.author, group=cls.group,
+                            text='котлета и котлета, а ещё кот')
+        autocomplete.build()
+
+    def test_trie_keeps_heaviest_first(self):
+        trie = autocomplete.Trie([(1, 'abc', 'light'), (5, 'abd', 'heavy'),
+                                  (3, 'xyz', 'other')], size=1)
+        self.assertEqual(trie.complete('ab'), ['heavy'])
+        self.assertEqual(trie.complete('abc'), ['light'])
+        self.assertEqual(trie.complete('q'), [])
+
+    def test_completions_need_no_queries(self):
+        with self.assertNumQueries(0):
+            suggestions = autocomplete.complete('Кот')
+        values = [suggestion['value'] for suggestion in suggestions]
+        self.assertEqual(values[0], 'котлета')
+        self.assertIn('Котики', values)
+        self.assertIn('kotofey', [suggestion['value'] for suggestion in
+                                  autocomplete.complete('kot')])
+        self.assertEqual(autocomplete.complete('cat')[0]['url'],
+                         reverse('posts:group_posts', args=['cats']))
+
+    def test_endpoint(self):
+        response = Client().get(reverse('posts:search_complete'),
+                                {'query': 'котл'})
+        self.assertEqual(response.json()['suggestions'][0]['value'],
+                         'котлета')
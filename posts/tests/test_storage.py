@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from posts import storage
+from posts.models import Blob, Post
+from posts.storage import media_storage
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def run_now(callback):
+    callback()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, WORKER_PROCESSES=0,
+                   MEDIA_UPLOAD_GRACE=0)
+@mock.patch('posts.storage.transaction',
+            mock.Mock(on_commit=run_now, atomic=transaction.atomic))
+class StorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        # files of the other tests have no rows: their saves rolled back
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        os.makedirs(MEDIA_ROOT)
+
+    def new_post(self, name, content):
+        post = Post(text='Текст', author=self.author)
+        post.image.save(name, ContentFile(content))
+        return post
+
+    def test_same_content_stored_once(self):
+        first = self.new_post('one.JPG', b'same')
+        second = self.new_post('two.jpg', b'same')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^users/[0-9a-f]{2}/[0-9a-f]{64}'
+                                           r'\.jpg$')
+        self.assertEqual(Blob.objects.get(name=first.image.name).refs, 2)
+        other = self.new_post('one.jpg', b'other')
+        self.assertNotEqual(other.image.name, first.image.name)
+
+    def test_file_removed_with_last_reference(self):
+        first = self.new_post('one.jpg', b'shared')
+        second = self.new_post('two.jpg', b'shared')
+        name = first.image.name
+        first.delete()
+        self.assertTrue(media_storage.exists(name))
+        second.image = ''
+        second.save()
+        self.assertFalse(media_storage.exists(name))
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+
+    def test_unsaved_files_are_left_alone(self):
+        path = os.path.join(MEDIA_ROOT, 'default.jpg')
+        with open(path, 'wb') as file_:
+            file_.write(b'default')
+        post = Post.objects.create(text='Текст', author=self.author,
+                                   image='default.jpg')
+        post.delete()
+        self.assertTrue(os.path.exists(path))
+
+    def test_new_upload_is_not_removed_under_it(self):
+        post = self.new_post('one.jpg', b'raced')
+        name = post.image.name
+        with self.settings(MEDIA_UPLOAD_GRACE=3600):
+            # the same content is uploaded again but not yet saved on a row
+            self.assertEqual(media_storage.save('users/two.jpg',
+                                                ContentFile(b'raced')), name)
+            post.delete()
+            self.assertTrue(media_storage.exists(name))
+            self.assertEqual(storage.sweep(), 0)
+        self.assertEqual(storage.sweep(), 1)
+        self.assertFalse(media_storage.exists(name))
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+
+    def test_sweep_removes_files_without_rows(self):
+        kept = self.new_post('kept.jpg', b'kept').image.name
+        orphan = media_storage.save('users/orphan.jpg', ContentFile(b'lost'))
+        # the upload was rolled back with its row
+        Blob.objects.filter(name=orphan).delete()
+        partial = os.path.join(MEDIA_ROOT, 'users', 'tmp1.upload')
+        with open(partial, 'wb') as file_:
+            file_.write(b'half')
+        self.assertEqual(storage.sweep(), 2)
+        self.assertFalse(media_storage.exists(orphan))
+        self.assertFalse(os.path.exists(partial))
+        self.assertTrue(media_storage.exists(kept))
+        self.assertEqual(Blob.objects.get(name=kept).refs, 1)
@@ -0,0 +1,40 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default
+
+from posts import thumbnails
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, WORKER_PROCESSES=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        buffer = BytesIO()
+        Image.new('RGB', (300, 200), 'red').save(buffer, 'JPEG')
+        upload = SimpleUploadedFile('red.jpg', buffer.getvalue())
+        self.name = default.storage.save('posts/red.jpg', upload)
+
+    def test_missing_thumbnail_gives_placeholder(self):
+        self.assertEqual(thumbnails.url(self.name, '50x50'),
+                         '/static/images/placeholder.png')
+        self.assertEqual(thumbnails.url('', '50x50'), '')
+
+    def test_generated_thumbnail_is_looked_up(self):
+        thumbnails.generate(self.name, ['50x50', '120x120'])
+        url = thumbnails.url(self.name, '120x120')
+        self.assertTrue(url.startswith('/media/cache/'))
+        with self.assertNumQueries(0):
+            self.assertEqual(thumbnails.url(self.name, '120x120'), url)
@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def feed(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return list(response.context['page'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        self.reader_client.get(reverse('posts:profile_follow',
+                                       args=['author']))
+        self.assertEqual(self.feed(), [self.old_post])
+
+        self.reader_client.get(reverse('posts:profile_unfollow',
+                                       args=['author']))
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader).exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_new_posts_are_fanned_out(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+        Post.objects.get(id=post.id).delete()
+        self.assertEqual(self.feed(), [self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_celebrity_posts_are_read_on_demand(self):
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.clear()
+        post = Post.objects.create(author=self.author, text='Для всех')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+        Follow.objects.filter(user=fan).delete()
+        timeline.refresh_celebrities()
+        # below the limit again: the author's posts are delivered
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+
+    def test_rebuild(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        self.assertEqual(timeline.rebuild(), 1)
+        self.assertEqual(self.feed(), [self.old_post])
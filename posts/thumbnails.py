@@ -0,0 +1,78 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.templatetags.static import static
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import workers
+
+logger = logging.getLogger(__name__)
+
+
+class ReadyThumbnailBackend(ThumbnailBackend):
+    """Looks thumbnails up in the key value store without creating them."""
+
+    def get_ready(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = ReadyThumbnailBackend()
+
+
+def _name(file_):
+    return getattr(file_, 'name', file_)
+
+
+def generate(name, geometries):
+    """Create the thumbnails of an image; runs in the worker processes."""
+    for geometry in geometries:
+        try:
+            get_thumbnail(name, geometry,
+                          **settings.THUMBNAIL_RENDITION_OPTIONS)
+        except Exception:
+            logger.exception('Thumbnail %s of %s failed', geometry, name)
+
+
+def enqueue(file_, rendition):
+    """Generate every geometry of ``rendition`` once the save commits."""
+    name = _name(file_)
+    if name:
+        geometries = settings.THUMBNAIL_RENDITIONS[rendition]
+        transaction.on_commit(
+            lambda: workers.submit(generate, name, geometries))
+
+
+def url(file_, geometry):
+    """Return the URL of a ready thumbnail, or of the placeholder.
+
+    A missing thumbnail is queued for generation instead of being made
+    in the request, like enqueue() does, once the request commits.
+    """
+    name = _name(file_)
+    if not name:
+        return ''
+    thumbnail = backend.get_ready(name, geometry,
+                                  **settings.THUMBNAIL_RENDITION_OPTIONS)
+    if thumbnail:
+        return thumbnail.url
+    if cache.add(f'thumbnail:pending:{geometry}:{name}', True,
+                 settings.THUMBNAIL_PENDING_TTL):
+        transaction.on_commit(
+            lambda: workers.submit(generate, name, [geometry]))
+    return static(settings.THUMBNAIL_PLACEHOLDER)
@@ -0,0 +1,117 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Follow, Post, TimelineEntry
+
+CELEBRITIES_KEY = 'timeline:celebrities'
+BATCH_SIZE = 1000
+
+
+def _entries(user_ids, posts):
+    return [TimelineEntry(user_id=user_id, post_id=post.id,
+                          author_id=post.author_id, pub_date=post.pub_date)
+            for user_id in user_ids for post in posts]
+
+
+def _deliver(user_ids, posts):
+    TimelineEntry.objects.bulk_create(_entries(user_ids, posts),
+                                      batch_size=BATCH_SIZE,
+                                      ignore_conflicts=True)
+
+
+def _followers(author_id):
+    return Follow.objects.filter(author_id=author_id).exclude(
+        user=None).values_list('user_id', flat=True)
+
+
+def _latest_posts(author_id):
+    return list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id')[:settings.TIMELINE_BACKFILL])
+
+
+def _count_celebrities():
+    return set(Follow.objects.values('author').annotate(
+        followers=Count('id')).filter(
+        followers__gt=settings.TIMELINE_FANOUT_LIMIT).values_list(
+        'author', flat=True))
+
+
+def refresh_celebrities():
+    """Recount which authors are read on demand instead of fanned out.
+
+    Authors that dropped below the limit get their latest posts
+    delivered, since their posts were not written to timelines before.
+    """
+    cached = cache.get(CELEBRITIES_KEY)
+    previous = cached[0] if cached else set()
+    celebrities = _count_celebrities()
+    for author_id in previous - celebrities:
+        _deliver(_followers(author_id), _latest_posts(author_id))
+    cache.set(CELEBRITIES_KEY,
+              (celebrities, time.time() + settings.TIMELINE_CELEBRITIES_TTL),
+              None)
+    return celebrities
+
+
+def get_celebrities():
+    """Return the ids of authors with more than TIMELINE_FANOUT_LIMIT
+    followers, recounted every TIMELINE_CELEBRITIES_TTL.
+    """
+    cached = cache.get(CELEBRITIES_KEY)
+    if cached is None or cached[1] < time.time():
+        return refresh_celebrities()
+    return cached[0]
+
+
+def fan_out(post):
+    """Write a new post to the timelines of its author's followers."""
+    if post.author_id and post.author_id not in get_celebrities():
+        _deliver(_followers(post.author_id), [post])
+
+
+def backfill(user_id, author_id):
+    """Deliver the latest posts of an author to a new follower."""
+    if author_id not in get_celebrities():
+        _deliver([user_id], _latest_posts(author_id))
+
+
+def prune(user_id, author_id):
+    """Remove an author's posts from the timeline of a former follower."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def get_feed(user):
+    """Return the follow feed of ``user`` newest first.
+
+    Posts of followed celebrities are read from their authors directly
+    and merged with the materialized timeline.
+    """
+    posts = Post.objects.for_feed()
+    celebrities = list(Follow.objects.filter(
+        user=user, author__in=get_celebrities()).values_list(
+        'author', flat=True))
+    if not celebrities:
+        return posts.filter(timeline_entries__user=user).order_by(
+            '-timeline_entries__pub_date', '-timeline_entries__post')
+    delivered = TimelineEntry.objects.filter(user=user).values('post')
+    return posts.filter(
+        Q(id__in=delivered) | Q(author__in=celebrities),
+    ).order_by('-pub_date', '-id')
+
+
+def rebuild(user_ids=None):
+    """Rebuild timelines from follows; return the number of entries."""
+    entries = TimelineEntry.objects.all()
+    follows = Follow.objects.exclude(user=None).exclude(author=None)
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+        follows = follows.filter(user_id__in=user_ids)
+    entries.delete()
+    celebrities = refresh_celebrities()
+    for follow in follows.exclude(author__in=celebrities).iterator():
+        backfill(follow.user_id, follow.author_id)
+    return TimelineEntry.objects.filter(
+        user_id__in=follows.values('user_id')).count()
@@ -11,11 +11,18 @@ urlpatterns = [
     path("chat/<int:chat_id>", views.show_chat, name="chat"),
     path("chat/<int:chat_id>/message/", views.message, name="message"),
     path('search/', views.post_search, name='post_search'),
+    path('search/complete/', views.search_complete, name='search_complete'),
     path("follow/", views.follow_index, name="follow_index"),
     path("<str:username>/follow/", views.profile_follow,
          name="profile_follow"),
     path("<str:username>/unfollow/", views.profile_unfollow,
          name="profile_unfollow"),
+    path("<str:username>/followers/", views.follow_list,
+         {'kind': 'followers'}, name="followers"),
+    path("<str:username>/following/", views.follow_list,
+         {'kind': 'following'}, name="following"),
+    path("<str:username>/mutuals/", views.follow_list,
+         {'kind': 'mutuals'}, name="mutuals"),
     path("group/<slug>/", views.group_posts, name='group_posts'),
     path("new", views.new_post, name='new_post'),
     path("new_group", views.new_group, name='new_group'),
@@ -31,6 +38,8 @@ urlpatterns = [
          name="like"),
     path("<str:username>/<int:post_id>/dislike/", views.dislike,
          name="dislike"),
+    path("<str:username>/<int:post_id>/react/", views.react,
+         name="react"),
     path("<str:username>/new_events", views.new_events,
          name="new_events"),
     path("404", views.page_not_found, name='page_not_found'),
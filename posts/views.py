@@ -1,34 +1,50 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_POST
 
-from django.db.models import Q
-from django.db.models import Max
-
+from . import (activity, autocomplete, counters, graph, inbox, pinned,
+               reactions, receipts, search, timeline)
 from .forms import CommentForm, PostForm, GroupForm, MessageForm
-from .models import Comment, Follow, Group, Post, Like, Dislike, Message, Chat
+from .models import Comment, Follow, Group, Post, Reaction, Message, Chat
+from .paginators import CursorPaginator
 
 
 User = get_user_model()
 PAGE_NUMBERS_FOR_PAGINATOR = 5
+FOLLOW_LIST_PAGE_SIZE = 20
+SUGGESTIONS_SHOWN = 5
+# follow list kind -> (query of posts.graph, page title)
+FOLLOW_LISTS = {
+    'followers': (graph.followers, 'Подписчики'),
+    'following': (graph.followees, 'Подписки'),
+    'mutuals': (graph.mutuals, 'Взаимные подписки'),
+}
+EVENTS_PAGE_SIZE = 20
+CHAT_PAGE_SIZE = 20
+CHATROOMS_PAGE_SIZE = 20
 
 
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, PAGE_NUMBERS_FOR_PAGINATOR)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'index.html', {'post_list':
-                                              post_list, 'page': page})
+    post_list = Post.objects.for_feed().filter(is_pinned=False)
+    paginator = CursorPaginator(post_list, PAGE_NUMBERS_FOR_PAGINATOR)
+    page = paginator.get_page(request.GET.get('cursor'))
+    pinned_posts = []
+    if not page.has_previous():
+        pinned_posts = pinned.get_pinned_posts()
+    return render(request, 'index.html', {'pinned_posts': pinned_posts,
+                                          'page': page})
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    group_list = group.posts.all()
-    paginator = Paginator(group_list, PAGE_NUMBERS_FOR_PAGINATOR)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group_list = Post.objects.for_feed().filter(group=group)
+    paginator = CursorPaginator(group_list, PAGE_NUMBERS_FOR_PAGINATOR)
+    page = paginator.get_page(request.GET.get('cursor'))
     return render(request, 'group.html',
                   {"group": group, 'page': page})
 
@@ -40,7 +56,9 @@ def new_post(request):
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
-            post.save()
+            # the post and its author's post_count are saved together
+            with transaction.atomic():
+                post.save()
             return redirect("posts:index")
 
         return render(request, 'new.html', {'form': form})
@@ -65,20 +83,14 @@ def new_group(request):
 
 @login_required
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    author_posts_list = author.posts.all()
-    following = author.following.all()
-    follower = request.user.follower.all()
-    is_follower = following.intersection(follower)
-    paginator = Paginator(author_posts_list, PAGE_NUMBERS_FOR_PAGINATOR)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    chat = None
-    results = Chat.objects.filter(
-                Q(user1=request.user) | Q(user1=author)).filter(
-        Q(user2=request.user) | Q(user2=author))
-    if results:
-        chat = results[0]
+    author = get_object_or_404(User.objects.select_related('profile'),
+                               username=username)
+    author_posts_list = Post.objects.for_feed().filter(author=author)
+    is_follower = Follow.objects.filter(user=request.user,
+                                        author=author).exists()
+    paginator = CursorPaginator(author_posts_list, PAGE_NUMBERS_FOR_PAGINATOR)
+    page = paginator.get_page(request.GET.get('cursor'))
+    chat = Chat.objects.between(request.user, author).first()
     return render(request, 'profile.html',
                   {"author": author, 'page': page,
                    'chat': chat, 'is_follower': is_follower})
@@ -86,19 +98,13 @@ def profile(request, username):
 
 @login_required
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    comments = Comment.objects.filter(post=post_id)
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id,
+                             author__username=username)
+    comments = Comment.objects.filter(post=post_id).select_related('author')
     if post.author == request.user:
-        for comment in comments:
-            comment.is_readed = True
-            comment.save()
+        receipts.mark_read(comments, 'comments', request.user)
     form = CommentForm()
-    chat = None
-    results = Chat.objects.filter(
-        Q(user1=request.user) | Q(user1=post.author)).filter(Q(
-        user2=request.user) | Q(user2=post.author))
-    if results:
-        chat = results[0]
+    chat = Chat.objects.between(request.user, post.author).first()
 
     return render(request, 'post.html', {'post': post, 'author': post.author,
                                          'comments': comments,
@@ -140,12 +146,11 @@ def server_error(request):
 
 @login_required
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    comments = Comment.objects.filter(post=post_id)
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id,
+                             author__username=username)
+    comments = Comment.objects.filter(post=post_id).select_related('author')
     if post.author == request.user:
-        for comment in comments:
-            comment.is_readed = True
-            comment.save()
+        receipts.mark_read(comments, 'comments', request.user)
 
     if request.method == 'POST':
         form = CommentForm(request.POST)
@@ -166,49 +171,45 @@ def add_comment(request, username, post_id):
 
 
 @login_required
+@transaction.atomic
 def new_events(request, username):
-    unreaded_comments = Comment.objects.filter(
-        post__author=request.user).filter(is_readed=False)
-    for comment in unreaded_comments:
-        comment.is_readed = True
-        comment.save()
-
-    new_followers = Follow.objects.filter(author=request.user).filter(
-        is_readed=False)
-    for follower in new_followers:
-        follower.is_readed = True
-        follower.save()
-
-    new_likes = Like.objects.filter(publication__author=request.user).filter(
-        is_readed=False)
-    for like in new_likes:
-        like.is_readed = True
-        like.save()
-
-    new_dislikes = Dislike.objects.filter(
-        publication__author=request.user).filter(is_readed=False)
-    for dislike in new_dislikes:
-        dislike.is_readed = True
-        dislike.save()
-
+    counter = counters.get_counter(request.user)
+    events, next_cursor = activity.get_timeline(
+        request.user, request.GET.get('cursor'), EVENTS_PAGE_SIZE)
+    activity.mark_seen(request.user, events)
     return render(request, 'new_comments.html',
-                  {'unreaded_comments': unreaded_comments,
-                   'new_followers': new_followers,
-                   'new_likes': new_likes,
-                   'new_dislikes': new_dislikes})
-
+                  {'counter': counter, 'events': events,
+                   'next_cursor': next_cursor})
 
 
 @login_required
 def follow_index(request):
-    following_authors_posts = Post.objects.filter(
-        author__following__user=request.user)
+    following_authors_posts = timeline.get_feed(request.user)
     paginator = Paginator(following_authors_posts, PAGE_NUMBERS_FOR_PAGINATOR)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
 
+    suggested = graph.suggestions(request.user.id, limit=SUGGESTIONS_SHOWN)
     return render(request, 'follow.html',
-                  {'page': page, 'paginator': paginator})
+                  {'page': page, 'paginator': paginator,
+                   'suggested': _users(suggested.ids)})
+
+
+def _users(ids):
+    """The users of ``ids`` with their profiles, in the order of ``ids``."""
+    users = User.objects.select_related('profile').in_bulk(ids)
+    return [users[user_id] for user_id in ids if user_id in users]
+
+
+def follow_list(request, username, kind):
+    author = get_object_or_404(User.objects.select_related('profile'),
+                               username=username)
+    query, title = FOLLOW_LISTS[kind]
+    ids, next_cursor = query(author.id, request.GET.get('cursor'),
+                             FOLLOW_LIST_PAGE_SIZE)
+    return render(request, 'follow_list.html',
+                  {'author': author, 'users': _users(ids), 'kind': kind,
+                   'title': title, 'next_cursor': next_cursor})
 
 
 @login_required
@@ -232,113 +233,129 @@ def profile_unfollow(request, username):
 def post_search(request):
     query = request.GET.get('query')
     if query:
-        results = Post.objects.filter(
-                Q(text__icontains=query) |
-                Q(author__username__icontains=query) |
-                Q(group__title__icontains=query))
-
-        return render(request, 'search.html', {'query': query, 'results': results})
+        page = search.get_page(query, request.GET.get('page'),
+                               PAGE_NUMBERS_FOR_PAGINATOR)
+        return render(request, 'search.html', {'query': query, 'page': page})
     return render(request, 'search.html')
 
 
+def search_complete(request):
+    query = request.GET.get('query', '')
+    return JsonResponse({'query': query,
+                         'suggestions': autocomplete.complete(query)})
+
+
+def _toggle_reaction(request, post_id, value):
+    post = get_object_or_404(Post.objects.only('id', 'author'), id=post_id)
+    return post, reactions.toggle(request.user, post, value)
+
+
 @login_required
 def like(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    dislike = Dislike.objects.filter(user=request.user, publication=post)
-    if not dislike:
-        like = Like.objects.get_or_create(user=request.user, publication=post)
-        if like[1]==False:
-            like[0].delete()
+    _toggle_reaction(request, post_id, Reaction.LIKE)
     prewious_url = request.META.get('HTTP_REFERER')
-    return redirect(prewious_url)
+    return redirect(prewious_url or reverse(
+        'posts:post', kwargs={'username': username, 'post_id': post_id}))
 
 
 @login_required
 def dislike(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    like = Like.objects.filter(user=request.user, publication=post)
-    if not like:
-        dislike = Dislike.objects.get_or_create(
-            user=request.user, publication=post)
-        if dislike[1]==False:
-            dislike[0].delete()
+    _toggle_reaction(request, post_id, Reaction.DISLIKE)
     prewious_url = request.META.get('HTTP_REFERER')
-    return redirect(prewious_url)
+    return redirect(prewious_url or reverse(
+        'posts:post', kwargs={'username': username, 'post_id': post_id}))
 
 
 @login_required
-def chatrooms(request):
-    chatrooms = Chat.objects.filter(
-            Q(user1=request.user) | Q(user2=request.user)).annotate(
-        max_data=Max('messages__msg_date')).order_by("-max_data")
+@require_POST
+def react(request, username, post_id):
+    values = {'like': Reaction.LIKE, 'dislike': Reaction.DISLIKE}
+    value = values.get(request.POST.get('value'))
+    if value is None:
+        return JsonResponse({'error': 'value must be like or dislike'},
+                            status=400)
+    post, reaction = _toggle_reaction(request, post_id, value)
+    counts = Post.objects.values('like_count', 'dislike_count').get(
+        id=post.id)
+    names = {number: name for name, number in values.items()}
+    return JsonResponse({
+        'reaction': names[reaction.value] if reaction else None,
+        **counts,
+    })
 
-    unreaded_messages = Message.objects.filter(
-        chat__in=chatrooms).filter(
-        is_readed=False).filter(recipient=request.user)
 
+@login_required
+def chatrooms(request):
+    paginator = CursorPaginator(inbox.get_inbox(request.user),
+                                CHATROOMS_PAGE_SIZE,
+                                ordering=('-last_message_at', '-id'))
+    page = paginator.get_page(request.GET.get('cursor'))
     return render(request, 'chatrooms.html',
-                  {'chatrooms': chatrooms})
+                  {'chatrooms': page, 'page': page})
+
 
 @login_required
 def create_chat(request, username):
     recipient = get_object_or_404(User, username=username)
-    form = MessageForm()
-    chat1 = Chat.objects.filter(user1=request.user).filter(user2=recipient)
-    chat2 = Chat.objects.filter(user2=request.user).filter(user1=recipient)
-    if chat1 or chat2:
-        prewious_url = request.META.get('HTTP_REFERER')
-        return redirect(prewious_url)
-
-    chat = Chat.objects.create(user1=request.user, user2=recipient)
-    return render(request, 'chat.html', {'chat': chat, 'form': form})
+    if recipient == request.user:
+        return redirect('posts:profile', username=username)
+    chat, _ = Chat.objects.get_or_create_between(request.user, recipient)
+    return redirect('posts:chat', chat_id=chat.id)
+
+
+def _chat_page(request, chat):
+    """Return one window of the chat history and mark it read."""
+    messages = Message.objects.filter(chat=chat).select_related(
+        'sender__profile')
+    paginator = CursorPaginator(messages, CHAT_PAGE_SIZE,
+                                ordering=('-msg_date', '-id'))
+    page = paginator.get_page(request.GET.get('cursor'))
+    readed = receipts.mark_read(
+        Message.objects.filter(id__in=[message.id for message in page],
+                               recipient=request.user),
+        'messages', request.user)
+    inbox.messages_read(chat, request.user, len(readed))
+    readed_ids = {message.id for message in readed}
+    for message in page:
+        if message.id in readed_ids:
+            message.is_readed = True
+    return page
 
 
 @login_required
 def show_chat(request, chat_id):
-    chat = get_object_or_404(Chat, id=chat_id)
+    chat = get_object_or_404(Chat.objects.select_related('user1', 'user2'),
+                             id=chat_id)
     if request.user != chat.user1 and request.user != chat.user2:
         return redirect('posts:index')
     form = MessageForm()
-    messages = Message.objects.filter(chat=chat).order_by("-msg_date")
-    for message in messages:
-        if message.recipient == request.user:
-            message.is_readed = True
-            message.save()
-    paginator = Paginator(messages, PAGE_NUMBERS_FOR_PAGINATOR)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = _chat_page(request, chat)
     return render(request, 'chat.html',
-                  {'chat': chat, 'form': form,
-                   'page': page, 'messages': messages})
+                  {'chat': chat, 'form': form, 'page': page})
 
 
 @login_required
 def message(request, chat_id):
-    chat = get_object_or_404(Chat, id=chat_id)
+    chat = get_object_or_404(Chat.objects.select_related('user1', 'user2'),
+                             id=chat_id)
     if request.user != chat.user1 and request.user != chat.user2:
         return redirect('posts:index')
+    if request.method != 'POST':
+        return redirect('posts:chat', chat_id=chat.id)
     if request.user != chat.user1:
         recipient = chat.user1
     else:
         recipient = chat.user2
 
-    messages = Message.objects.filter(chat=chat).order_by("-msg_date")
+    form = MessageForm(request.POST)
+    if form.is_valid():
+        message = form.save(commit=False)
+        message.sender = request.user
+        message.recipient = recipient
+        message.chat = chat
+        message.save()
+        return redirect('posts:chat', chat_id=chat.id)
 
-    if request.method == 'POST':
-        form = MessageForm(request.POST)
-        if form.is_valid():
-            message = form.save(commit=False)
-            message.sender = request.user
-            message.recipient = recipient
-            message.chat = chat
-            message.save()
-            chat.last_message = message
-            chat.save()
-            return redirect('posts:chat', chat_id=chat.id)
-
-        return render(request, 'chat.html',
-                      {'form': form, 'chat': chat, 'messages':messages})
-
-    form = MessageForm()
+    page = _chat_page(request, chat)
     return render(request, 'chat.html',
-                  {'form': form, 'chat': chat, 'messages': messages})
+                  {'form': form, 'chat': chat, 'page': page})
@@ -0,0 +1,68 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+
+_pool = None
+_lock = threading.Lock()
+
+
+def _init_worker():
+    # workers are spawned, not forked: they share no database connections
+    # with the web process and set Django up on their own
+    django.setup()
+
+
+def get_pool():
+    """Return the process pool of this web process, starting it lazily."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.WORKER_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def submit(function, *args):
+    """Run ``function(*args)`` in the pool, or inline with no workers.
+
+    ``function`` must be importable by the workers: a module-level
+    function with picklable arguments.
+    """
+    if not settings.WORKER_PROCESSES:
+        function(*args)
+        return None
+    return get_pool().submit(function, *args)
+
+
+def run(function, *args):
+    """Run ``function(*args)`` in the pool and wait for its result.
+
+    Exceptions raised by the function are raised here as well, and so
+    are TimeoutError after WORKER_TIMEOUT and BrokenProcessPool if a
+    worker died; a broken pool is replaced on the next call.
+    """
+    if not settings.WORKER_PROCESSES:
+        return function(*args)
+    pool = get_pool()
+    try:
+        return pool.submit(function, *args).result(
+            timeout=settings.WORKER_TIMEOUT)
+    except BrokenProcessPool:
+        _discard(pool)
+        raise
+
+
+def _discard(pool):
+    """Forget the broken ``pool`` so that get_pool() starts a new one."""
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
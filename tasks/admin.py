@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_after', 'created')
+    list_filter = ('status', 'name')
+    empty_value_display = "-пусто-"
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,21 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks import queue
+
+
+class Command(BaseCommand):
+    help = 'Run queued tasks; keeps polling for new ones unless --once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no task is due')
+
+    def handle(self, *args, **options):
+        ran = queue.run_pending()
+        while not options['once']:
+            time.sleep(settings.TASK_POLL_INTERVAL)
+            ran += queue.run_pending()
+        self.stdout.write(f'Tasks run: {ran}')
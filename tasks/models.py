@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """A function call waiting to run outside of the request.
+
+    A task is written in the transaction of the change that asks for it,
+    so it is saved if and only if that change is. It is deleted once it
+    has run; a task failing TASK_MAX_ATTEMPTS times is kept as failed.
+    """
+    PENDING = 'p'
+    FAILED = 'f'
+    STATUSES = (
+        (PENDING, 'Ждёт'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField(max_length=200)
+    args = models.TextField(default='[]')
+    status = models.CharField(max_length=1, choices=STATUSES,
+                              default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    # set while a worker runs the task; a worker that died lets it expire
+    locked_until = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['run_after', 'id'], name='task_due_idx',
+                         condition=models.Q(status='p')),
+        ]
+
+    def __str__(self):
+        return self.name
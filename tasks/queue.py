@@ -0,0 +1,111 @@
+import json
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def enqueue(function, *args, delay=0):
+    """Ask for ``function(*args)`` to be run by a worker.
+
+    ``function`` must be a module-level function and ``args`` JSON
+    serializable. With the 'thread' runner the task is started in this
+    process as soon as the current transaction commits.
+    """
+    task = Task.objects.create(
+        name=f'{function.__module__}.{function.__qualname__}',
+        args=json.dumps(args),
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    if settings.TASKS_RUNNER == 'thread':
+        transaction.on_commit(_wake)
+    return task
+
+
+def _due(now):
+    return Task.objects.filter(
+        Q(locked_until=None) | Q(locked_until__lt=now),
+        status=Task.PENDING, run_after__lte=now)
+
+
+def claim(limit):
+    """Lock up to ``limit`` due tasks for this worker and return them."""
+    now = timezone.now()
+    claimed = []
+    for task_id in _due(now).order_by('run_after', 'id').values_list(
+            'id', flat=True)[:limit]:
+        # another worker may have claimed it since it was read
+        locked = _due(now).filter(id=task_id).update(
+            locked_until=now + timedelta(seconds=settings.TASK_LOCK_TIMEOUT),
+            attempts=F('attempts') + 1)
+        if locked:
+            claimed.append(Task.objects.get(id=task_id))
+    return claimed
+
+
+def run(task):
+    """Run a claimed task; a failing one is retried later, with backoff.
+    """
+    try:
+        import_string(task.name)(*json.loads(task.args))
+    except Exception:
+        logger.exception('Task %s failed', task.name)
+        failed = task.attempts >= settings.TASK_MAX_ATTEMPTS
+        Task.objects.filter(id=task.id).update(
+            status=Task.FAILED if failed else Task.PENDING,
+            locked_until=None,
+            run_after=timezone.now() + timedelta(
+                seconds=settings.TASK_RETRY_DELAY * task.attempts),
+            error=traceback.format_exc())
+        return False
+    Task.objects.filter(id=task.id).delete()
+    return True
+
+
+def run_pending(batch_size=100):
+    """Run due tasks until there are none left; return how many ran."""
+    ran = 0
+    while True:
+        tasks = claim(batch_size)
+        if not tasks:
+            return ran
+        for task in tasks:
+            run(task)
+        ran += len(tasks)
+
+
+def _work():
+    while True:
+        _wakeup.wait(settings.TASK_POLL_INTERVAL)
+        _wakeup.clear()
+        try:
+            run_pending()
+        except Exception:
+            logger.exception('Task worker failed')
+        finally:
+            # the thread has its own connection; don't hold it idle
+            connection.close()
+
+
+def _wake():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_work, name='tasks',
+                                       daemon=True)
+            _worker.start()
+    _wakeup.set()
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from posts.models import Chat, Message
+from tasks import queue
+from tasks.models import Task
+from users import onboarding
+from users.models import Profile
+
+User = get_user_model()
+
+calls = []
+
+
+def record(*args):
+    calls.append(args)
+
+
+def fail():
+    raise RuntimeError('failed')
+
+
+@override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_DELAY=0)
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_tasks_run_once(self):
+        queue.enqueue(record, 1, 'a')
+        queue.enqueue(record, 2, delay=60)
+        self.assertEqual(queue.run_pending(), 1)
+        self.assertEqual(calls, [(1, 'a')])
+        self.assertEqual(queue.run_pending(), 0)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_claimed_tasks_are_not_claimed_again(self):
+        queue.enqueue(record)
+        self.assertEqual(len(queue.claim(10)), 1)
+        self.assertEqual(queue.claim(10), [])
+
+    def test_failing_task_is_retried_then_kept(self):
+        queue.enqueue(fail)
+        with mock.patch('tasks.queue.logger'):
+            queue.run_pending()
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 2))
+        self.assertIn('RuntimeError', task.error)
+
+
+class OnboardingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_signup_without_superuser(self):
+        user = User.objects.create_user(username='first')
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+        queue.run_pending()
+        self.assertFalse(Message.objects.exists())
+
+    def test_welcome_message_is_sent_once(self):
+        admin = User.objects.create_superuser(username='admin', email='',
+                                              password='admin')
+        user = User.objects.create_user(username='user')
+        self.assertFalse(Message.objects.exists())
+        queue.run_pending()
+        onboarding.send_welcome_message(user.id)
+        message = Message.objects.get()
+        self.assertEqual((message.sender, message.recipient), (admin, user))
+        self.assertEqual(message.chat, Chat.objects.between(admin, user).get())
+
+    def test_system_sender_is_cached(self):
+        admin = User.objects.create_superuser(username='admin', email='',
+                                              password='admin')
+        self.assertEqual(onboarding.system_sender(), admin.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(onboarding.system_sender(), admin.id)
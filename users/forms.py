@@ -2,6 +2,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 from django.forms import ModelForm
 
+from posts import images
+
 from .models import Profile
 
 User = get_user_model()
@@ -18,3 +20,7 @@ class ProfileForm(ModelForm):
         model = Profile
         fields = ('avatar', 'info')
 
+    def clean_avatar(self):
+        return images.clean_upload(self, 'avatar', 'avatar_width',
+                                   'avatar_height')
+
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_auto_20210404_1955'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
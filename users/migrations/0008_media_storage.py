@@ -0,0 +1,19 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:21
+
+from django.db import migrations, models
+import posts.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_image_dimensions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='avatar',
+            field=models.ImageField(default='default.jpg', storage=posts.storage.ContentAddressedStorage(), upload_to='users/'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_profile_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-follower_count', '-user'], name='profile_popular_idx'),
+        ),
+    ]
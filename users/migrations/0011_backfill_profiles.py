@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+
+def create_missing_profiles(apps, schema_editor):
+    """Give every user a Profile with its counts; users who signed up
+    before profiles were made on signup have none, and the directory
+    sorted by followers would leave them out."""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Profile = apps.get_model('users', 'Profile')
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    user_ids = list(User.objects.filter(profile=None).values_list(
+        'id', flat=True))
+    if not user_ids:
+        return
+
+    def counts(model, owner):
+        rows = model.objects.filter(**{f'{owner}__in': user_ids}).values(
+            owner).annotate(total=Count('id'))
+        return {row[owner]: row['total'] for row in rows}
+
+    followers = counts(Follow, 'author')
+    following = counts(Follow, 'user')
+    posts = counts(Post, 'author')
+    Profile.objects.bulk_create([
+        Profile(user_id=user_id,
+                follower_count=followers.get(user_id, 0),
+                following_count=following.get(user_id, 0),
+                post_count=posts.get(user_id, 0))
+        for user_id in user_ids
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0041_blob_registered'),
+        ('users', '0010_profile_popular_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles,
+                             migrations.RunPython.noop),
+    ]
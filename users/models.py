@@ -1,13 +1,41 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from posts.storage import media_storage
+
 User = get_user_model()
 
+COUNT_FIELDS = ('follower_count', 'following_count', 'post_count')
+
 
 class Profile(models.Model):
     user = models.OneToOneField(User,
                                 on_delete=models.CASCADE,
                                 related_name='profile')
     avatar = models.ImageField(default="default.jpg",
-                               upload_to='users/', blank=False, null=False)
+                               upload_to='users/', storage=media_storage,
+                               blank=False, null=False)
+    avatar_width = models.PositiveIntegerField(blank=True, null=True,
+                                               editable=False)
+    avatar_height = models.PositiveIntegerField(blank=True, null=True,
+                                                editable=False)
     info = models.TextField(blank=True, null=True)
+    follower_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # the user directory sorted by popularity
+            models.Index(fields=['-follower_count', '-user'],
+                         name='profile_popular_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # like the Post counters, these only change through F() updates
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNT_FIELDS
+            ]
+        super().save(*args, **kwargs)
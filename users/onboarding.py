@@ -0,0 +1,56 @@
+"""What happens to a new user after signing up.
+
+Signing up only creates the profile and queues start(); each step then
+runs as its own task, so adding steps does not slow down the signup.
+Steps get the id of the new user and may be run more than once.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from posts.models import Chat, Message
+from tasks import queue
+
+User = get_user_model()
+
+SYSTEM_SENDER_KEY = 'onboarding:system_sender'
+
+
+def system_sender():
+    """Return the id of the user onboarding messages come from.
+
+    That is the first superuser, or None if there is none yet.
+    """
+    sender_id = cache.get(SYSTEM_SENDER_KEY)
+    if sender_id is None:
+        sender_id = User.objects.filter(is_superuser=True).order_by(
+            'id').values_list('id', flat=True).first() or 0
+        cache.set(SYSTEM_SENDER_KEY, sender_id,
+                  settings.ONBOARDING_SENDER_TTL)
+    return sender_id or None
+
+
+def forget_system_sender():
+    cache.delete(SYSTEM_SENDER_KEY)
+
+
+def send_welcome_message(user_id):
+    sender_id = system_sender()
+    if sender_id is None or sender_id == user_id:
+        return
+    sender = User(id=sender_id)
+    user = User(id=user_id)
+    chat, created = Chat.objects.get_or_create_between(sender, user)
+    if not created and Message.objects.filter(
+            chat=chat, sender_id=sender_id).exists():
+        return
+    Message.objects.create(sender=sender, recipient=user, text='hello',
+                           chat=chat)
+
+
+STEPS = [send_welcome_message]
+
+
+def start(user_id):
+    for step in STEPS:
+        queue.enqueue(step, user_id)
@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from users import views
+
+User = get_user_model()
+
+
+class DirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in ('anna', 'boris', 'bella', 'vera'):
+            User.objects.create_user(username=name)
+        boris = User.objects.get(username='boris')
+        for name in ('anna', 'vera'):
+            Follow.objects.create(user=User.objects.get(username=name),
+                                  author=boris)
+        Follow.objects.create(user=boris,
+                              author=User.objects.get(username='vera'))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def names(self, response, field='username'):
+        return [getattr(row, field) for row in response.context['page']]
+
+    def test_users_sorted_and_paginated(self):
+        url = reverse('show_all_users')
+        views.DIRECTORY_PAGE_SIZE, size = 3, views.DIRECTORY_PAGE_SIZE
+        try:
+            response = self.client.get(url)
+            self.assertEqual(self.names(response), ['anna', 'bella', 'boris'])
+            cursor = response.context['page'].next_cursor
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(self.names(response), ['vera'])
+            self.assertContains(response, 'sort=name&amp;prefix=&amp;cursor=')
+        finally:
+            views.DIRECTORY_PAGE_SIZE = size
+
+        response = self.client.get(url, {'sort': 'popular'})
+        self.assertEqual(self.names(response)[:2], ['boris', 'vera'])
+        response = self.client.get(url, {'prefix': 'B'})
+        self.assertEqual(self.names(response), ['bella', 'boris'])
+        self.assertEqual(response.context['paginator'].count, 2)
+
+    def test_cached_page_reads_no_rows(self):
+        url = reverse('show_all_users')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, '@ boris')
+        # the sidebar still runs its own queries, but not the page's
+        self.assertFalse([query for query in queries
+                          if 'ORDER BY "auth_user"."username"'
+                          in query['sql']])
+
+    def test_groups_sorted_by_posts(self):
+        author = User.objects.get(username='anna')
+        small = Group.objects.create(title='Альфа', slug='alpha')
+        big = Group.objects.create(title='Бета', slug='beta')
+        for group in (small, big, big):
+            Post.objects.create(text='Текст', author=author, group=group)
+        post = Post.objects.filter(group=big).first()
+        post.group = None
+        post.save()
+        self.assertEqual(
+            list(Group.objects.values_list('slug', 'post_count')),
+            [('alpha', 1), ('beta', 1)])
+        post.group = big
+        post.save()
+
+        response = self.client.get(reverse('show_all_groups'),
+                                   {'sort': 'popular'})
+        self.assertEqual(self.names(response, 'slug'), ['beta', 'alpha'])
+
+
+class ProfileBackfillMigrationTests(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_users_without_profile_get_one(self):
+        apps = self.migrate([('users', '0010_profile_popular_idx'),
+                             ('posts', '0041_blob_registered')])
+        HistoricalUser = apps.get_model('auth', 'User')
+        Profile = apps.get_model('users', 'Profile')
+        old = HistoricalUser.objects.create(username='old')
+        fan = HistoricalUser.objects.create(username='fan')
+        Profile.objects.create(user=fan, following_count=1)
+        apps.get_model('posts', 'Follow').objects.create(user=fan,
+                                                         author=old)
+
+        apps = self.migrate([('users', '0011_backfill_profiles')])
+        Profile = apps.get_model('users', 'Profile')
+        self.assertEqual(
+            Profile.objects.values_list('user__username', 'follower_count',
+                                        'following_count').get(user_id=old.id),
+            ('old', 1, 0))
+        self.assertEqual(Profile.objects.count(), 2)
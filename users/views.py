@@ -1,3 +1,6 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
@@ -5,13 +8,30 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect, render
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject
 
+from . import onboarding
 from .forms import CreationForm, ProfileForm
 from .models import Profile
-from posts.models import Chat, Message, Group
+from posts.models import Group
+from posts.paginators import CursorPaginator
+from tasks import queue
 
 User = get_user_model()
 
+DIRECTORY_PAGE_SIZE = 20
+DIRECTORY_PREFIX_LENGTH = 50
+# sort order -> ordering; each one is backed by an index and ends with a
+# unique field, as CursorPaginator needs
+USER_ORDERINGS = {
+    'name': ('username',),
+    'popular': ('-profile__follower_count', '-id'),
+}
+GROUP_ORDERINGS = {
+    'name': ('title', 'id'),
+    'popular': ('-post_count', '-id'),
+}
+
 
 class SignUpView(CreateView):
     form_class = CreationForm
@@ -32,31 +52,49 @@ def add_info(request):
 
 
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    admin = User.objects.filter(is_superuser = True)[0]
-    if created:
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    if instance.is_superuser:
+        onboarding.forget_system_sender()
+    if created and not raw:
         Profile.objects.create(user=instance)
-        chat = Chat.objects.create(user1=admin, user2=instance)
-        message = Message.objects.create(sender=admin,
-                               recipient=instance,
-                               text='hello',
-                               chat=chat
-                               )
-        chat.last_message = message
-        chat.save()
+        queue.enqueue(onboarding.start, instance.id)
+
+
+def _directory(request, queryset, orderings, name_field):
+    """Context of a directory page: a lazily fetched cursor page.
+
+    The page is only read from the database if its fragment is not in the
+    cache, so a cached directory page costs no query but the count.
+    """
+    sort = request.GET.get('sort')
+    if sort not in orderings:
+        sort = 'name'
+    prefix = request.GET.get('prefix', '').strip()[:DIRECTORY_PREFIX_LENGTH]
+    if prefix:
+        queryset = queryset.filter(**{f'{name_field}__istartswith': prefix})
+    paginator = CursorPaginator(queryset.order_by(*orderings[sort]),
+                                DIRECTORY_PAGE_SIZE,
+                                ordering=orderings[sort],
+                                approximate_count=True)
+    cursor = request.GET.get('cursor', '')
+    return {
+        'page': SimpleLazyObject(lambda: paginator.get_page(cursor)),
+        'paginator': paginator,
+        'sort': sort,
+        'prefix': prefix,
+        'cursor': cursor,
+        'query': urlencode({'sort': sort, 'prefix': prefix}),
+        'cache_ttl': settings.DIRECTORY_CACHE_TTL,
+    }
 
 
 def show_all_users(request):
-    all_users = User.objects.all()
-    return render(request, 'all_users.html', {'all_users': all_users})
-
-def show_all_groups(request):
-    all_groups = Group.objects.all()
-    return render(request, 'all_groups.html', {'all_groups': all_groups})
-
-
-
-
-
+    context = _directory(request, User.objects.select_related('profile'),
+                         USER_ORDERINGS, 'username')
+    return render(request, 'all_users.html', context)
 
 
+def show_all_groups(request):
+    context = _directory(request, Group.objects.all(), GROUP_ORDERINGS,
+                         'title')
+    return render(request, 'all_groups.html', context)
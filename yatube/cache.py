@@ -0,0 +1,392 @@
+"""Cache backends shared by all the processes of the site.
+
+SQLiteCache keeps the entries in one SQLite file: it needs no server and
+works across the web and worker processes of one machine. RedisCache
+stores them in Redis for deployments with more machines. LocMemCache is
+private to its process and is used by the tests. All of them count hits
+and misses per key family, see CacheMetricsMixin.
+"""
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.core.cache.backends import locmem
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+METRICS_PREFIX = 'cache-metrics'
+FAMILIES_KEY = f'{METRICS_PREFIX}:families'
+# keys of {% cache %}: template.cache.<fragment name>.<hash of vary_on>
+FRAGMENT_PREFIX = 'template.cache.'
+
+
+def key_family(key):
+    """The part of a key before its first separator: ``search`` for
+    ``search:3:9f1c...``; metrics are kept per family. Fragments of the
+    {% cache %} tag are counted per fragment name."""
+    if key.startswith(FRAGMENT_PREFIX):
+        return key.rsplit('.', 1)[0]
+    return re.split(r'[:|]', key, 1)[0]
+
+
+class CacheMetricsMixin:
+    """Counts hits and misses of get() and get_many() per key family.
+
+    Counts are kept in the process and added to the cache itself every
+    METRICS_INTERVAL seconds (an option, 10 by default), so that
+    metrics() reports the totals of all the processes.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self._metrics_interval = params.get('OPTIONS', {}).get(
+            'METRICS_INTERVAL', 10)
+        self._counts = Counter()
+        self._counts_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def _record(self, key, hit):
+        with self._counts_lock:
+            self._counts[key_family(key), 'hits' if hit else 'misses'] += 1
+            due = (time.monotonic() - self._flushed_at
+                   >= self._metrics_interval)
+        if due:
+            self.flush_metrics()
+
+    def flush_metrics(self):
+        """Add the counts of this process to the shared totals."""
+        with self._counts_lock:
+            counts, self._counts = self._counts, Counter()
+            self._flushed_at = time.monotonic()
+        if not counts:
+            return
+        families = {family for family, _ in counts}
+        known = super().get(FAMILIES_KEY, set())
+        if not families <= known:
+            super().set(FAMILIES_KEY, known | families, None)
+        for (family, kind), count in counts.items():
+            key = f'{METRICS_PREFIX}:{family}:{kind}'
+            super().add(key, 0, None)
+            super().incr(key, count)
+
+    def metrics(self):
+        """Return {family: (hits, misses)} of all the processes."""
+        self.flush_metrics()
+        families = super().get(FAMILIES_KEY, set())
+        keys = [f'{METRICS_PREFIX}:{family}:{kind}'
+                for family in families for kind in ('hits', 'misses')]
+        values = super().get_many(keys)
+        return {
+            family: (values.get(f'{METRICS_PREFIX}:{family}:hits', 0),
+                     values.get(f'{METRICS_PREFIX}:{family}:misses', 0))
+            for family in sorted(families)
+        }
+
+    def reset_metrics(self):
+        families = super().get(FAMILIES_KEY, set())
+        super().delete_many(
+            [f'{METRICS_PREFIX}:{family}:{kind}'
+             for family in families for kind in ('hits', 'misses')]
+            + [FAMILIES_KEY])
+        with self._counts_lock:
+            self._counts.clear()
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = super().get(key, missing, version)
+        self._record(key, value is not missing)
+        return default if value is missing else value
+
+    def get_many(self, keys, version=None):
+        found = super().get_many(keys, version)
+        for key in keys:
+            self._record(key, key in found)
+        return found
+
+
+class BaseSQLiteCache(BaseCache):
+    """LRU cache with expiry in a SQLite file.
+
+    LOCATION is the path of the file. Once more than MAX_ENTRIES are
+    stored, the expired entries and 1/CULL_FREQUENCY of the least
+    recently used ones are removed. The use time of an entry is only
+    written when it is older than TOUCH_INTERVAL seconds (an option, 60
+    by default), so recency is known to that precision.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._options = params.get('OPTIONS', {})
+        self._touch_interval = self._options.get('TOUCH_INTERVAL', 60)
+        self._local = threading.local()
+        self._sets = 0
+
+    @property
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            # autocommit, transactions are begun explicitly when needed
+            db = sqlite3.connect(self._path, timeout=10,
+                                 isolation_level=None,
+                                 check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute('CREATE TABLE IF NOT EXISTS cache ('
+                       'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                       'expires REAL, used REAL NOT NULL)')
+            db.execute('CREATE INDEX IF NOT EXISTS cache_used '
+                       'ON cache (used)')
+            self._local.db = db
+        return db
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _write(self, key, value, timeout, only_new=False):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if only_new:
+                db.execute('DELETE FROM cache WHERE key = ? AND '
+                           'expires IS NOT NULL AND expires <= ?', (key, now))
+                written = db.execute(
+                    'INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?)',
+                    (key, data, expires, now)).rowcount
+            else:
+                written = db.execute(
+                    'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                    (key, data, expires, now)).rowcount
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        self._sets += 1
+        # counting the rows on every write would cost more than culling
+        if self._sets % 100 == 0:
+            self._cull()
+        return bool(written)
+
+    def _cull(self):
+        db = self._db
+        db.execute('DELETE FROM cache WHERE expires IS NOT NULL AND '
+                   'expires <= ?', (time.time(),))
+        count, = db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count > self._max_entries:
+            excess = count - self._max_entries
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY used LIMIT ?)',
+                (excess + self._max_entries // self._cull_frequency,))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write(self._key(key, version), value, timeout,
+                           only_new=True)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(self._key(key, version), value, timeout)
+
+    def get(self, key, default=None, version=None):
+        return self._fetch([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        return self._fetch(keys, version)
+
+    def _fetch(self, keys, version):
+        made = {self._key(key, version): key for key in keys}
+        if not made:
+            return {}
+        now = time.time()
+        db = self._db
+        marks = ', '.join('?' * len(made))
+        rows = db.execute(
+            f'SELECT key, value, used FROM cache WHERE key IN ({marks}) AND '
+            f'(expires IS NULL OR expires > ?)', [*made, now]).fetchall()
+        # a read takes the write lock only to move a stale use time, so
+        # most reads do not wait for each other
+        stale = [key for key, _, used in rows
+                 if used < now - self._touch_interval]
+        if stale:
+            db.execute(
+                f'UPDATE cache SET used = ? WHERE key IN '
+                f'({", ".join("?" * len(stale))})', [now, *stale])
+        return {made[key]: pickle.loads(value) for key, value, _ in rows}
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? AND '
+            '(expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time())).rowcount)
+
+    def delete(self, key, version=None):
+        self._db.execute('DELETE FROM cache WHERE key = ?',
+                         (self._key(key, version),))
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            marks = ', '.join('?' * len(keys))
+            self._db.execute(f'DELETE FROM cache WHERE key IN ({marks})', keys)
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? AND '
+            '(expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time())).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? AND '
+                '(expires IS NULL OR expires > ?)',
+                (key, time.time())).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            db.execute('UPDATE cache SET value = ? WHERE key = ?',
+                       (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return value
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # connections are kept for the life of the thread, like the
+        # sockets of the memcached backends
+        pass
+
+
+class BaseRedisCache(BaseCache):
+    """Adapter for Redis, or servers speaking its protocol.
+
+    LOCATION is a redis:// URL. Needs the ``redis`` package. Integers are
+    stored as such so that incr() is atomic; other values are pickled.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                'RedisCache needs the redis package: pip install redis')
+        self._client = redis.Redis.from_url(location)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return None if timeout is None else int(timeout)
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load(data):
+        try:
+            return int(data)
+        except ValueError:
+            return pickle.loads(data)
+
+    def _write(self, key, value, timeout, only_new=False):
+        ttl = self._ttl(timeout)
+        if ttl is not None and ttl <= 0:
+            if not only_new:
+                self._client.delete(key)
+            return False
+        return bool(self._client.set(key, self._dump(value), ex=ttl,
+                                     nx=only_new))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write(self._key(key, version), value, timeout,
+                           only_new=True)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(self._key(key, version), value, timeout)
+
+    def get(self, key, default=None, version=None):
+        data = self._client.get(self._key(key, version))
+        return default if data is None else self._load(data)
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        values = self._client.mget([self._key(key, version) for key in keys])
+        return {key: self._load(data)
+                for key, data in zip(keys, values) if data is not None}
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        ttl = self._ttl(timeout)
+        if ttl is None:
+            return bool(self._client.persist(key)) or bool(
+                self._client.exists(key))
+        return bool(self._client.expire(key, ttl))
+
+    def delete(self, key, version=None):
+        self._client.delete(self._key(key, version))
+
+    def delete_many(self, keys, version=None):
+        if keys:
+            self._client.delete(*[self._key(key, version) for key in keys])
+
+    def has_key(self, key, version=None):
+        return bool(self._client.exists(self._key(key, version)))
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        if not self._client.exists(key):
+            raise ValueError(f"Key '{key}' not found")
+        return self._client.incrby(key, delta)
+
+    def clear(self):
+        # only the keys of this site: the server may be shared
+        pattern = self.make_key('*')
+        for keys in _chunks(self._client.scan_iter(pattern), 500):
+            self._client.delete(*keys)
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class SQLiteCache(CacheMetricsMixin, BaseSQLiteCache):
+    pass
+
+
+class RedisCache(CacheMetricsMixin, BaseRedisCache):
+    pass
+
+
+class LocMemCache(CacheMetricsMixin, locmem.LocMemCache):
+    pass
@@ -1,9 +1,8 @@
 import datetime as dt
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
-from django.db.models import Count
+from django.utils.functional import SimpleLazyObject
 
-from posts.models import Group, Post, Comment, Follow, Like, Dislike, Message
+from posts import counters, leaderboards
 
 User = get_user_model()
 
@@ -14,37 +13,37 @@ def year(request):
 
 
 def new_authors(request):
-    new_authors = User.objects.order_by("-date_joined")[:3]
+    new_authors = User.objects.select_related("profile").order_by(
+        "-date_joined")[:3]
 
     return {'new_authors': new_authors}
 
 
 def popular(request):
-    annotated_authors = User.objects.annotate(
-        likes_count=Count('posts__like', distinct=True)).annotate(
-        comments_count=Count('posts__comments', distinct=True)).order_by("-likes_count")[:3]
-    annotated_groups = Group.objects.annotate(
-        posts_count=Count('posts')).order_by("-posts_count")[:3]
-    return {'popular_authors': annotated_authors,
-            'popular_groups': annotated_groups}
+    boards = SimpleLazyObject(leaderboards.get_leaderboards)
+    return {'popular_authors': SimpleLazyObject(lambda: boards['authors']),
+            'popular_groups': SimpleLazyObject(lambda: boards['groups'])}
+
+
+def _notification_counter(request):
+    if not hasattr(request, '_notification_counter'):
+        request._notification_counter = counters.get_counter(request.user)
+    return request._notification_counter
 
 
 def unreaded_comments(request):
-    if request.user.is_authenticated:
-        unreaded_comments = Comment.objects.filter(post__author=request.user).filter(is_readed=False)
-        new_followers = Follow.objects.filter(author=request.user).filter(is_readed=False)
-        new_likes = Like.objects.filter(publication__author=request.user).filter(is_readed=False)
-        new_dislikes = Dislike.objects.filter(publication__author=request.user).filter(is_readed=False)
-        new_events_count = unreaded_comments.count() + new_followers.count() + new_likes.count() + new_dislikes.count()
-        return {'new_events_count': new_events_count }
-    else:
-        return {'new_events_count': None}
+    def count():
+        if request.user.is_authenticated:
+            return _notification_counter(request).events
+        return None
+
+    return {'new_events_count': SimpleLazyObject(count)}
+
 
 def new_messages(request):
-    if request.user.is_authenticated:
-        new_messages = Message.objects.filter(recipient=request.user).filter(is_readed=False)
-        new_messages_count = new_messages.count()
-        return {'new_messages_count': new_messages_count }
-    else:
-        return {'new_messages_count': None}
+    def count():
+        if request.user.is_authenticated:
+            return _notification_counter(request).messages
+        return None
 
+    return {'new_messages_count': SimpleLazyObject(count)}
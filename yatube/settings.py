@@ -1,8 +1,12 @@
 
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# set under manage.py test and pytest
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
 LOGIN_URL = "/auth/login/"
 LOGIN_REDIRECT_URL = "posts:index"
 
@@ -26,6 +30,7 @@ INSTALLED_APPS = [
     'about',
     'users',
     'posts',
+    'tasks',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -115,8 +120,105 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# the cache is shared by the web and worker processes: 'sqlite' keeps it
+# in a file of this machine, 'redis' on the server at CACHE_REDIS_URL;
+# tests get a cache of their own process
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND',
+                               'locmem' if TESTING else 'sqlite')
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'yatube.cache.LocMemCache',
+    },
+    'sqlite': {
+        'BACKEND': 'yatube.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'redis': {
+        'BACKEND': 'yatube.cache.RedisCache',
+        'LOCATION': os.environ.get('CACHE_REDIS_URL',
+                                   'redis://localhost:6379/0'),
+        'KEY_PREFIX': 'yatube',
+    },
+}
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+
+LEADERBOARD_SIZE = 3
+# rankings are recomputed in the background once they are this old...
+LEADERBOARD_TTL = 60 * 5
+# ...and dropped from the cache entirely after this
+LEADERBOARD_STALE_TTL = 60 * 60 * 24
+
+PINNED_POSTS_TTL = 60 * 10
+
+# how long CursorPaginator(approximate_count=True) trusts a cached total
+PAGINATOR_COUNT_TTL = 60 * 10
+
+SEARCH_CACHE_TTL = 60 * 5
+
+# suggestions per prefix, and how old the autocomplete trie may get
+AUTOCOMPLETE_SIZE = 10
+AUTOCOMPLETE_TTL = 60 * 10
+# frequent words are taken from this many latest posts
+AUTOCOMPLETE_POSTS = 2000
+AUTOCOMPLETE_TERMS = 5000
+
+# posts of authors with more followers are not copied to the follow feeds
+# of every follower but read from the author when a feed is shown
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_CELEBRITIES_TTL = 60 * 10
+# latest posts of an author delivered to a new follower
+TIMELINE_BACKFILL = 1000
+
+# processes for background jobs such as thumbnails; 0 runs them inline,
+# as tests do: spawned workers would not see the test database
+WORKER_PROCESSES = 0 if TESTING else 2
+# seconds a request waits for a job it needs the result of
+WORKER_TIMEOUT = 30
+
+# thumbnails generated for every saved image, by kind of image
+THUMBNAIL_RENDITIONS = {
+    'post': ['1500x750'],
+    'avatar': ['220x220', '120x120', '100x100', '70x70', '50x50'],
+    'icon': ['40x40'],
 }
+THUMBNAIL_RENDITION_OPTIONS = {'crop': 'center', 'upscale': True}
+THUMBNAIL_ICONS = ['like2.jpg', 'dislike2.jpg']
+# shown until a thumbnail is ready; a missing one is queued at most once
+# per this many seconds
+THUMBNAIL_PLACEHOLDER = 'images/placeholder.png'
+THUMBNAIL_PENDING_TTL = 60
+
+# uploads are downscaled to fit this box and re-encoded; larger images
+# (by pixel count) are refused before they are decoded
+IMAGE_MAX_SIZE = 2048
+IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+IMAGE_JPEG_QUALITY = 85
+# an unreferenced upload is kept this long for the row it is saved for;
+# manage.py sweep_media removes it afterwards
+MEDIA_UPLOAD_GRACE = 60 * 60
+
+# user ids per page of the follow graph queries; suggestions are drawn
+# from this many of the latest followees
+GRAPH_PAGE_SIZE = 100
+GRAPH_SUGGESTION_SOURCES = 200
+
+# 'thread' runs queued tasks in a thread of the web process once the
+# request commits; with 'command' they wait for manage.py run_tasks
+TASKS_RUNNER = 'thread'
+TASK_POLL_INTERVAL = 5
+TASK_LOCK_TIMEOUT = 60 * 5
+# a failing task is retried after attempts * TASK_RETRY_DELAY seconds
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 60
+
+# how long the sender of onboarding messages is remembered
+ONBOARDING_SENDER_TTL = 60 * 60
+
+# rendered pages of the user and group directories are cached this long
+DIRECTORY_CACHE_TTL = 60
+
+# rendered post cards are kept this long; their keys change with the post
+POST_CARD_CACHE_TTL = 60 * 60 * 24